@@ -1,5 +1,6 @@
 import re
 import httpx
+import orjson
 import logging
 from fastapi import APIRouter, HTTPException, status, Query
 from app.dtos.weather_dto import WeatherResponse, ForecastResponse
@@ -66,7 +67,7 @@ async def get_weather(
         try:
             points_resp = await client.get(points_url, headers=headers)
             points_resp.raise_for_status()
-            points_data = points_resp.json()
+            points_data = orjson.loads(points_resp.content)
         except httpx.HTTPStatusError as e:
             detail = "Coordinates may be outside NWS coverage area (US only)." if e.response.status_code == 404 else "Error fetching point metadata"
             raise HTTPException(status_code=e.response.status_code, detail=detail)
@@ -101,7 +102,7 @@ async def get_weather(
         try:
             forecast_resp = await client.get(forecast_url, headers=headers)
             forecast_resp.raise_for_status()
-            forecast_data = forecast_resp.json()
+            forecast_data = orjson.loads(forecast_resp.content)
         except httpx.HTTPStatusError as e:
             raise HTTPException(status_code=e.response.status_code, detail="Error fetching forecast grid data")
         
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy.orm import validates
 from .base import Base
 
 
@@ -11,5 +12,13 @@ class User(Base):
     name = Column(String(255), nullable=False)
     preferences = Column(JSON, default=list)
 
+    @validates("preferences")
+    def _normalize_preferences(self, key, preferences):
+        # Drop duplicates once at write time (keeping the user's order) so
+        # readers can use the stored list as-is.
+        if preferences is None:
+            return []
+        return list(dict.fromkeys(preferences))
+
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', name='{self.name}')>"
@@ -1,6 +1,9 @@
+import asyncio
+import threading
 import google.generativeai as genai
 import httpx
-from typing import List
+import orjson
+from typing import Dict, List, Tuple
 from fastapi import HTTPException
 
 from app.config import settings
@@ -8,6 +11,31 @@ from app.dtos.recommendation_dto import RecommendationInput, RecommendationResul
 from app.repositories.circle_repository import CircleRepository
 from app.repositories.user_repository import UserRepository
 
+# In-flight NWS fetches keyed by rounded (lat, lon). Services are built per
+# request, so this lives at module level to let concurrent requests share one
+# upstream call instead of each hitting api.weather.gov.
+_weather_inflight: Dict[Tuple[float, float], "asyncio.Task[str]"] = {}
+
+# NWS forecast grid cell (office, gridX, gridY) per rounded (lat, lon). The
+# mapping is static, so after the first /points lookup a forecast needs one call.
+_weather_grid_cache: Dict[Tuple[float, float], Tuple[str, int, int]] = {}
+_GRIDPOINT_FORECAST_URL = "https://api.weather.gov/gridpoints/{0}/{1},{2}/forecast"
+
+# Gemini model shared by every service instance; built once on first use.
+_gemini_model = None
+_gemini_model_lock = threading.Lock()
+
+
+def _get_gemini_model():
+    """Return the process-wide Gemini model, creating it on first call."""
+    global _gemini_model
+    if _gemini_model is None:
+        with _gemini_model_lock:
+            if _gemini_model is None:
+                genai.configure(api_key=settings.GEMINI_API_KEY)
+                _gemini_model = genai.GenerativeModel("gemini-2.5-flash")
+    return _gemini_model
+
 
 class RecommendationService:
     """Service for generating activity recommendations using Google Gemini."""
@@ -19,21 +47,41 @@ class RecommendationService:
     ):
         self.user_repository = user_repository
         self.circle_repository = circle_repository
-        self._model = None
 
     @property
     def model(self):
-        """Lazy-load Gemini model."""
-        if self._model is None:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self._model = genai.GenerativeModel("gemini-2.5-flash")
-        return self._model
+        """Lazy-load the shared Gemini model."""
+        return _get_gemini_model()
+
+    @staticmethod
+    def _format_period(index: int, period: dict) -> str:
+        """
+        Format a single NWS forecast period as one line of the Gemini prompt.
+
+        Example: "Today: 75°F, wind 5 mph, 20% precip, Partly Cloudy"
+        """
+        get = period.get
+        precip = get("probabilityOfPrecipitation")
+
+        # Handle precipitation (may be dict or scalar)
+        if isinstance(precip, dict):
+            precip = precip.get("value")
+        precip_val = precip or 0
+
+        precip_desc = f"{precip_val}% precip" if precip_val > 0 else "no precip"
+        return (
+            f"{get('name', f'Period {index + 1}')}: {get('temperature', 70)}°F, "
+            f"wind {get('windSpeed', 'calm')}, {precip_desc}, {get('shortForecast', '')}"
+        )
 
     async def _fetch_weather_data(self, lat: float = 35.78, lon: float = -78.69) -> str:
         """
         Fetch weather data from NWS API and format it for Gemini prompt.
         Returns a 4-day forecast (8 periods covering day/night cycles).
 
+        Concurrent calls for the same location are coalesced into a single
+        upstream fetch whose result is shared by every waiter.
+
         Args:
             lat: Latitude (defaults to Raleigh, NC)
             lon: Longitude (defaults to Raleigh, NC)
@@ -41,6 +89,26 @@ class RecommendationService:
         Returns:
             Formatted weather string for Gemini prompt with 4-day forecast
         """
+        key = (round(lat, 4), round(lon, 4))
+
+        task = _weather_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request_weather_data(*key))
+            _weather_inflight[key] = task
+            task.add_done_callback(lambda _: _weather_inflight.pop(key, None))
+
+        # Shield so a cancelled waiter does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _request_weather_data(self, lat: float, lon: float) -> str:
+        """
+        Perform the NWS round trips for a rounded location.
+
+        The points lookup is only needed to discover the forecast grid cell, so
+        once a location's (office, gridX, gridY) is known the forecast is fetched
+        directly with a single call. A 404 on that call drops the cached cell
+        and falls back to the points + forecast flow.
+        """
         headers = {
             "User-Agent": "(outsource.com, contact@outsource.com)",
             "Accept": "application/geo+json"
@@ -48,24 +116,43 @@ class RecommendationService:
 
         try:
             async with httpx.AsyncClient(follow_redirects=True, timeout=10.0) as client:
-                # Get point metadata
-                points_url = f"https://api.weather.gov/points/{round(lat, 4)},{round(lon, 4)}"
-                points_resp = await client.get(points_url, headers=headers)
-                points_resp.raise_for_status()
-                points_data = points_resp.json()
-
-                # Extract forecast URL
-                properties = points_data.get("properties", {})
-                forecast_url = properties.get("forecast") or points_data.get("forecast")
-
-                if not forecast_url:
-                    # Fallback to placeholder if API fails
-                    return "temp 75 F low wind no precipitation"
+                forecast_resp = None
+
+                grid = _weather_grid_cache.get((lat, lon))
+                if grid is not None:
+                    forecast_resp = await client.get(_GRIDPOINT_FORECAST_URL.format(*grid), headers=headers)
+                    if forecast_resp.status_code == 404:
+                        _weather_grid_cache.pop((lat, lon), None)
+                        forecast_resp = None
+
+                if forecast_resp is None:
+                    # Get point metadata
+                    points_url = f"https://api.weather.gov/points/{lat},{lon}"
+                    points_resp = await client.get(points_url, headers=headers)
+                    points_resp.raise_for_status()
+                    points_data = orjson.loads(points_resp.content)
+
+                    # Extract forecast URL
+                    properties = points_data.get("properties", {})
+                    forecast_url = properties.get("forecast") or points_data.get("forecast")
+
+                    if not forecast_url:
+                        # Fallback to placeholder if API fails
+                        return "temp 75 F low wind no precipitation"
+
+                    # Remember the grid cell so later calls can skip this lookup
+                    grid = tuple(
+                        properties.get(field, points_data.get(field))
+                        for field in ("gridId", "gridX", "gridY")
+                    )
+                    if all(part is not None for part in grid):
+                        _weather_grid_cache[(lat, lon)] = grid
+
+                    # Get forecast
+                    forecast_resp = await client.get(forecast_url, headers=headers)
 
-                # Get forecast
-                forecast_resp = await client.get(forecast_url, headers=headers)
                 forecast_resp.raise_for_status()
-                forecast_data = forecast_resp.json()
+                forecast_data = orjson.loads(forecast_resp.content)
 
                 # Parse first 8 periods (approximately 4 days - day/night cycles)
                 properties = forecast_data.get("properties", {})
@@ -74,30 +161,10 @@ class RecommendationService:
                 if not periods:
                     return "temp 75 F low wind no precipitation"
 
-                # Collect forecast for next 4 days (up to 8 periods)
-                forecast_summary = []
-                for i, period in enumerate(periods[:8]):
-                    temp = period.get("temperature", 70)
-                    wind = period.get("windSpeed", "calm")
-                    precip = period.get("probabilityOfPrecipitation")
-
-                    # Handle precipitation (may be dict or scalar)
-                    if isinstance(precip, dict):
-                        precip_val = precip.get("value", 0)
-                    else:
-                        precip_val = precip if precip is not None else 0
-
-                    period_name = period.get("name", f"Period {i+1}")
-                    short_forecast = period.get("shortForecast", "")
-
-                    # Format: "Today: 75°F, wind 5 mph, 20% precip, Partly Cloudy"
-                    precip_desc = f"{precip_val}% precip" if precip_val > 0 else "no precip"
-                    forecast_summary.append(
-                        f"{period_name}: {temp}°F, wind {wind}, {precip_desc}, {short_forecast}"
-                    )
-
-                # Join all periods with newlines for better readability
-                return "\n".join(forecast_summary)
+                # Format the next 4 days (up to 8 periods), one line per period
+                return "\n".join(
+                    self._format_period(i, period) for i, period in enumerate(periods[:8])
+                )
 
         except Exception as e:
             # Fallback to placeholder on any error
@@ -12,6 +12,21 @@ from fastapi import HTTPException
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+def _to_user_response(user: User) -> UserResponseDTO:
+    """
+    Build a UserResponseDTO from a persisted User without re-running validation.
+
+    Rows loaded from or just written to our own database are already trusted,
+    so model_construct is used instead of model_validate.
+    """
+    return UserResponseDTO.model_construct(
+        id=user.id,
+        username=user.username,
+        name=user.name,
+        preferences=user.preferences or []
+    )
+
+
 class UserService:
     def __init__(
         self,
@@ -27,13 +42,13 @@ class UserService:
         user = self.user_repository.get_by_id(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        return UserResponseDTO.model_validate(user)
+        return _to_user_response(user)
 
     def get_user_by_username(self, username: str) -> Optional[UserResponseDTO]:
         user = self.user_repository.get_by_username(username)
         if not user:
             return None
-        return UserResponseDTO.model_validate(user)
+        return _to_user_response(user)
 
     def get_all_users(self) -> List[UserBasicDTO]:
         user_list = self.user_repository.get_all()
@@ -80,7 +95,7 @@ class UserService:
 
         # Save to database
         created_user = self.user_repository.create(user)
-        return UserResponseDTO.model_validate(created_user)
+        return _to_user_response(created_user)
 
     def update_user(self, user_id: int, user_dto: UserUpdateDTO) -> UserResponseDTO:
         user = self.user_repository.get_by_id(user_id)
@@ -93,7 +108,7 @@ class UserService:
             user.preferences = user_dto.preferences
 
         updated_user = self.user_repository.update(user)
-        return UserResponseDTO.model_validate(updated_user)
+        return _to_user_response(updated_user)
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         return pwd_context.verify(plain_password, hashed_password)
@@ -0,0 +1,176 @@
+import atexit
+import os
+import unittest
+from typing import Any, Generator, List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+from passlib.context import CryptContext
+
+from app.main import app
+from app.database import Base, get_db
+from app.models.user import User
+from app.models.associations import Friends, FriendRequests
+from app.services import auth_service
+from app.testing.asgi_client import ASGITestClient
+from app.utils.jwt_utils import create_access_token
+
+# These tests cover API routes, not hashing. bcrypt runs at its minimum cost, and
+# OUTSOURCE_TEST_FAST=1 skips it altogether by storing passwords as-is.
+FAST_HASHING = bool(os.getenv("OUTSOURCE_TEST_FAST"))
+if FAST_HASHING:
+    pwd_context = CryptContext(schemes=["plaintext"])
+else:
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4)
+
+# Every fixture user shares one password, so hash it once at import
+PASSWORD = "password123"
+HASHED_PASSWORD = pwd_context.hash(PASSWORD)
+
+# passlib picks its bcrypt backend lazily on first use; load it at import so that
+# cost isn't charged to whichever test hashes with the app's contexts first.
+auth_service.pwd_context.handler("bcrypt").get_backend()
+
+TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
+
+engine = create_engine(
+    TEST_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+
+
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    # pysqlite's implicit BEGIN handling breaks SAVEPOINTs; let SQLAlchemy
+    # emit BEGIN itself (see the "begin" listener below).
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "connect")
+def _tune_sqlite(dbapi_connection, connection_record):
+    # Nothing here needs durability; StaticPool means this runs once per process
+    cursor = dbapi_connection.cursor()
+    cursor.executescript(
+        "PRAGMA journal_mode=MEMORY;"
+        "PRAGMA synchronous=OFF;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA locking_mode=EXCLUSIVE;"
+    )
+    cursor.close()
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(connection):
+    connection.exec_driver_sql("BEGIN")
+
+
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+# Every API test module shares this engine, so the schema is built once per
+# process; test classes only clear their rows on the way out.
+Base.metadata.create_all(bind=engine)
+
+
+def clear_tables() -> None:
+    """Delete every row from the test schema, keeping the tables for the next class."""
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+# The client holds no DB state (get_db is overridden per class), so one serves
+# every API test class in the process; close its event loop when the process exits
+client = ASGITestClient(app)
+atexit.register(client.close)
+
+
+class BaseAPITest(unittest.TestCase):
+    """Shared scaffolding for API tests against the in-memory test engine.
+
+    The schema and client are created once at import. The get_db override is set
+    up once per class, and setup_test_data() commits the class's fixture rows
+    once. Each test then runs in an outer transaction that tearDown rolls back.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.client = client
+
+        # Register the DB override once; setUp points it at each test's session
+        cls._db_ref = {"session": None}
+
+        def override_get_db() -> Generator[Session, None, None]:
+            yield cls._db_ref["session"]
+
+        app.dependency_overrides[get_db] = override_get_db
+        # Registered before any rows are committed, so a failing setup still
+        # leaves the shared database empty for the next class
+        cls.addClassCleanup(clear_tables)
+        cls.addClassCleanup(app.dependency_overrides.pop, get_db, None)
+
+        # Create the fixture rows once. They are committed outside any test
+        # transaction, so each test's rollback leaves them in place.
+        seed_db: Session = TestingSessionLocal()
+        cls._db_ref["session"] = seed_db
+        try:
+            cls.setup_test_data(seed_db)
+        finally:
+            cls._db_ref["session"] = None
+            seed_db.close()
+
+    def setUp(self) -> None:
+        # Run the test inside an outer transaction. Commits made by the test or
+        # the app only release a SAVEPOINT, so tearDown can undo everything.
+        self.connection = engine.connect()
+        self.transaction = self.connection.begin()
+        self.db: Session = TestingSessionLocal(
+            bind=self.connection, join_transaction_mode="create_savepoint"
+        )
+        self._db_ref["session"] = self.db
+
+    def tearDown(self) -> None:
+        # Detach the override + roll back everything the test wrote
+        self._db_ref["session"] = None
+        self.db.close()
+        self.transaction.rollback()
+        self.connection.close()
+
+    # -----------
+    # Helpers
+    # -----------
+
+    @classmethod
+    def setup_test_data(cls, db: Session):
+        """Create the class's fixture rows; subclasses override this."""
+
+    @staticmethod
+    def mint_tokens(users: List[User]) -> List[str]:
+        """Return access tokens with the same claims /login issues."""
+        return [create_access_token(data={"sub": str(user.id)}) for user in users]
+
+    @staticmethod
+    def get_auth_headers(token: str) -> dict:
+        """Return Authorization header for authenticated requests."""
+        return {"Authorization": f"Bearer {token}"}
+
+    def create_friendship(self, user1_id: int, user2_id: int):
+        """Create a friendship directly in database."""
+        return self.bulk_add([Friends(user1_id=user1_id, user2_id=user2_id)])[0]
+
+    def create_friend_request(self, outgoing_user_id: int, incoming_user_id: int, status: str = "pending"):
+        """Create a friend request directly in database."""
+        request = FriendRequests(
+            outgoing_user_id=outgoing_user_id,
+            incoming_user_id=incoming_user_id,
+            status=status
+        )
+        return self.bulk_add([request])[0]
+
+    def bulk_add(self, objs: List[Any]) -> List[Any]:
+        """Add rows directly in database with a single commit."""
+        self.db.add_all(objs)
+        self.db.commit()
+        return objs
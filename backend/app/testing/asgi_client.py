@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any
+
+import httpx
+import orjson
+from fastapi import FastAPI
+
+
+class ASGITestClient:
+    """Synchronous facade over one persistent httpx.AsyncClient bound to an ASGI app.
+
+    Requests are dispatched straight into the app through httpx.ASGITransport on a
+    private event loop that lives as long as the client, so there is no per-request
+    thread portal (as with TestClient) and no per-call asyncio.run() loop setup.
+    Lifespan events are not run, matching TestClient used without a ``with`` block.
+    ``json=`` bodies are encoded with orjson rather than the stdlib json module.
+    """
+
+    def __init__(self, app: FastAPI, base_url: str = "http://testserver") -> None:
+        self._loop = asyncio.new_event_loop()
+        self._client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url=base_url,
+            follow_redirects=True,
+        )
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        body = kwargs.pop("json", None)
+        if body is not None:
+            kwargs["content"] = orjson.dumps(body)
+            kwargs["headers"] = {"content-type": "application/json", **(kwargs.get("headers") or {})}
+        return self._loop.run_until_complete(self._client.request(method, url, **kwargs))
+
+    def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self) -> None:
+        self._loop.run_until_complete(self._client.aclose())
+        self._loop.close()
@@ -1,82 +1,92 @@
 import unittest
-from typing import Generator
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+from unittest import mock
 
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+import orjson
+from jose import ExpiredSignatureError, JWTError, jwt
+from sqlalchemy import insert
+from passlib.context import CryptContext
 
-from app.main import app
-from app.database import Base, get_db
+from app.config import settings
 from app.models.user import User
+from app.services import auth_service, user_service
+from app.testing._base import BaseAPITest
+from app.utils import jwt_utils
 
 
-TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
+# Tests exercise the auth flow, not hashing, so passwords are stored as-is.
+# Tests that assert on the real hash format opt back in via real_password_hashing().
+test_pwd_context = CryptContext(schemes=["plaintext"])
 
-engine = create_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The services' own (bcrypt) contexts, captured before any test patches them
+APP_PWD_CONTEXTS = {module: module.pwd_context for module in (auth_service, user_service)}
 
 
-class TestAuthAPI(unittest.TestCase):
-    def setUp(self) -> None:
-        # Create tables for this test
-        Base.metadata.create_all(bind=engine)
-        self.db: Session = TestingSessionLocal()
+@contextmanager
+def real_password_hashing():
+    """Give the auth and user services their real bcrypt context back."""
+    with ExitStack() as stack:
+        for module, pwd_context in APP_PWD_CONTEXTS.items():
+            stack.enter_context(mock.patch.object(module, "pwd_context", pwd_context))
+        yield
+
 
-        # Override the app DB dependency to use the test session
-        def override_get_db() -> Generator[Session, None, None]:
-            yield self.db
+class TestAuthAPI(BaseAPITest):
+    @classmethod
+    def setUpClass(cls) -> None:
+        # Sign tokens with HMAC and a throwaway secret, whatever the local .env
+        # says; these tests cover the auth flow, not the signing algorithm.
+        jwt_patcher = mock.patch.multiple(
+            settings, JWT_ALGORITHM="HS256", JWT_SECRET_KEY="auth-api-test-secret"
+        )
+        jwt_patcher.start()
+        cls.addClassCleanup(jwt_patcher.stop)
+        super().setUpClass()
 
-        app.dependency_overrides[get_db] = override_get_db
-        self.client = TestClient(app)
+    def setUp(self) -> None:
+        super().setUp()
 
-    def tearDown(self) -> None:
-        # Cleanup dependency overrides + DB
-        app.dependency_overrides.clear()
-        self.db.close()
-        Base.metadata.drop_all(bind=engine)
+        # Make /signup and /login hash and verify with the no-op test context
+        for module in APP_PWD_CONTEXTS:
+            patcher = mock.patch.object(module, "pwd_context", test_pwd_context)
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
     # -----------
     # Helpers
     # -----------
 
-    def create_user_direct(self, username: str, password: str, name: str):
-        """Create user directly via authenticated endpoint and return token."""
-        # First, create a test user that we can use to authenticate
-        # For the very first user, we'll need to bypass auth temporarily
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-        user = User(
-            username=username,
-            password=pwd_context.hash(password),
-            name=name,
-            preferences=[]
+    def create_user_direct(self, username: str, password: str, name: str) -> SimpleNamespace:
+        """Insert a user row directly (bypasses the API) and return its basic fields."""
+        # Core INSERT ... RETURNING: no ORM flush or follow-up SELECT needed
+        user_id = self.db.scalar(
+            insert(User).returning(User.id),
+            {
+                "username": username,
+                "password": test_pwd_context.hash(password),
+                "name": name,
+                "preferences": [],
+            },
         )
-        self.db.add(user)
         self.db.commit()
-        self.db.refresh(user)
-        return user
+        return SimpleNamespace(id=user_id, username=username, name=name)
+
+    def json(self, res):
+        """Decode a JSON response body with orjson."""
+        return orjson.loads(res.content)
 
     def login(self, username: str, password: str):
         """Login a user and return the response."""
         return self.client.post(
-            "/login",
+            "/auth/login",
             json={"username": username, "password": password}
         )
 
-    def get_auth_headers(self, token: str) -> dict:
-        """Return Authorization header dict for authenticated requests."""
-        return {"Authorization": f"Bearer {token}"}
-
     def signup(self, username: str, password: str, name: str, preferences=None):
         """Sign up a new user and return the response."""
         return self.client.post(
-            "/signup",
+            "/auth/signup",
             json={
                 "username": username,
                 "password": password,
@@ -94,7 +104,7 @@ class TestAuthAPI(unittest.TestCase):
         res = self.signup("newuser", "securepass123", "New User", ["sports", "music"])
         self.assertEqual(res.status_code, 201, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertIn("access_token", body)
         self.assertIn("token_type", body)
         self.assertEqual(body["token_type"], "bearer")
@@ -113,7 +123,8 @@ class TestAuthAPI(unittest.TestCase):
 
     def test_signup_hashes_password(self):
         """Test signup stores hashed password, not plaintext."""
-        res = self.signup("testuser", "mypassword", "Test User")
+        with real_password_hashing():
+            res = self.signup("testuser", "mypassword", "Test User")
         self.assertEqual(res.status_code, 201, msg=res.text)
 
         # Verify password is hashed
@@ -131,7 +142,7 @@ class TestAuthAPI(unittest.TestCase):
         res = self.signup("johndoe", "password2", "Jane Doe")
         self.assertEqual(res.status_code, 400, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertIn("detail", body)
         self.assertEqual(body["detail"], "Username already exists")
 
@@ -140,7 +151,7 @@ class TestAuthAPI(unittest.TestCase):
         res = self.signup("alice", "password123", "Alice Smith", ["coding"])
         self.assertEqual(res.status_code, 201, msg=res.text)
 
-        token = res.json()["access_token"]
+        token = self.json(res)["access_token"]
 
         # Use token to access protected endpoint
         user_res = self.client.get(
@@ -149,7 +160,7 @@ class TestAuthAPI(unittest.TestCase):
         )
         self.assertEqual(user_res.status_code, 200, msg=user_res.text)
 
-        user_body = user_res.json()
+        user_body = self.json(user_res)
         self.assertEqual(user_body["username"], "alice")
         self.assertEqual(user_body["name"], "Alice Smith")
         self.assertEqual(user_body["preferences"], ["coding"])
@@ -164,7 +175,7 @@ class TestAuthAPI(unittest.TestCase):
         login_res = self.login("bob", "mypassword")
         self.assertEqual(login_res.status_code, 200, msg=login_res.text)
 
-        login_body = login_res.json()
+        login_body = self.json(login_res)
         self.assertIn("access_token", login_body)
         self.assertTrue(len(login_body["access_token"]) > 0)
 
@@ -189,6 +200,15 @@ class TestAuthAPI(unittest.TestCase):
         self.assertIsNotNone(user)
         self.assertEqual(user.preferences, preferences)
 
+    def test_signup_drops_duplicate_preferences(self):
+        """Test signup stores each preference once, in first-seen order."""
+        res = self.signup("dupprefs", "password123", "Dup User", ["reading", "gaming", "reading"])
+        self.assertEqual(res.status_code, 201, msg=res.text)
+
+        user = self.db.query(User).filter(User.username == "dupprefs").first()
+        self.assertIsNotNone(user)
+        self.assertEqual(user.preferences, ["reading", "gaming"])
+
     # -----------
     # Tests - Login
     # -----------
@@ -202,7 +222,7 @@ class TestAuthAPI(unittest.TestCase):
         res = self.login("testuser", "password123")
         self.assertEqual(res.status_code, 200, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertIn("access_token", body)
         self.assertIn("token_type", body)
         self.assertEqual(body["token_type"], "bearer")
@@ -213,7 +233,7 @@ class TestAuthAPI(unittest.TestCase):
         res = self.login("nonexistent", "password123")
         self.assertEqual(res.status_code, 401, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertIn("detail", body)
         self.assertEqual(body["detail"], "Incorrect username or password")
 
@@ -226,16 +246,16 @@ class TestAuthAPI(unittest.TestCase):
         res = self.login("testuser", "wrongpassword")
         self.assertEqual(res.status_code, 401, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertIn("detail", body)
         self.assertEqual(body["detail"], "Incorrect username or password")
 
     def test_logout_returns_200(self):
         """Test logout endpoint returns success."""
-        res = self.client.post("/logout")
+        res = self.client.post("/auth/logout")
         self.assertEqual(res.status_code, 200, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertIn("message", body)
         self.assertEqual(body["message"], "Successfully logged out")
 
@@ -251,7 +271,7 @@ class TestAuthAPI(unittest.TestCase):
         login_res = self.login("testuser", "password123")
         self.assertEqual(login_res.status_code, 200)
 
-        token = login_res.json()["access_token"]
+        token = self.json(login_res)["access_token"]
 
         # Access protected endpoint
         res = self.client.get("/users", headers=self.get_auth_headers(token))
@@ -272,7 +292,7 @@ class TestAuthAPI(unittest.TestCase):
         login_res = self.login("alice", "password123")
         self.assertEqual(login_res.status_code, 200)
 
-        token = login_res.json()["access_token"]
+        token = self.json(login_res)["access_token"]
 
         # Get current user
         res = self.client.get(
@@ -281,10 +301,102 @@ class TestAuthAPI(unittest.TestCase):
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertEqual(body["username"], "alice")
         self.assertEqual(body["name"], "Alice Smith")
 
 
+class TestJWTUtils(unittest.TestCase):
+    """Token signing and verification in app.utils.jwt_utils, without the API."""
+
+    SECRET = "jwt-utils-test-secret"
+
+    def setUp(self) -> None:
+        jwt_patcher = mock.patch.multiple(
+            settings, JWT_ALGORITHM="HS256", JWT_SECRET_KEY=self.SECRET
+        )
+        jwt_patcher.start()
+        self.addCleanup(jwt_patcher.stop)
+
+        # Start every test from a cold verification cache
+        jwt_utils._decode_cached.cache_clear()
+        self.addCleanup(jwt_utils._decode_cached.cache_clear)
+
+    def freeze_time(self, now: float) -> mock.MagicMock:
+        """Make jwt_utils read now from the clock until the test ends."""
+        patcher = mock.patch.object(jwt_utils, "time")
+        clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        clock.time.return_value = now
+        return clock
+
+    # -----------
+    # Tests - create_access_token
+    # -----------
+
+    def test_create_access_token_matches_jose_for_hs256(self):
+        """Test the direct HS256 signer emits exactly the token jwt.encode would."""
+        self.freeze_time(1_700_000_000.5)
+        exp = 1_700_000_000 + settings.JWT_ACCESS_TOKEN_EXPIRE_HOURS * 3600
+
+        for data in (
+            {"sub": "42"},
+            {"sub": "7", "name": "Zoë Ångström", "city": "東京", "note": "🚀 \"quoted\" \\ </script>"},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(
+                    jwt_utils.create_access_token(data=data),
+                    jwt.encode({**data, "exp": exp}, self.SECRET, algorithm="HS256"),
+                )
+
+    def test_create_access_token_uses_jose_for_other_algorithms(self):
+        """Test algorithms other than HS256 are still signed by python-jose."""
+        with mock.patch.object(settings, "JWT_ALGORITHM", "HS512"), \
+                mock.patch.object(jwt_utils.jwt, "encode", wraps=jwt.encode) as encode, \
+                mock.patch.object(jwt_utils, "_encode_hs256") as encode_hs256:
+            token = jwt_utils.create_access_token(data={"sub": "1"})
+
+        encode.assert_called_once_with(mock.ANY, self.SECRET, algorithm="HS512")
+        encode_hs256.assert_not_called()
+        self.assertEqual(jwt.get_unverified_header(token)["alg"], "HS512")
+        self.assertEqual(jwt.decode(token, self.SECRET, algorithms=["HS512"])["sub"], "1")
+
+    # -----------
+    # Tests - verify_token
+    # -----------
+
+    def test_verify_token_rejects_cached_token_once_expired(self):
+        """Test a token verified while valid is rejected from the cache after its exp."""
+        token = jwt_utils.create_access_token(data={"sub": "1"})
+        exp = jwt_utils.verify_token(token)["exp"]
+        self.assertEqual(jwt_utils._decode_cached.cache_info().currsize, 1)
+
+        self.freeze_time(exp + 1)
+        with self.assertRaises(ExpiredSignatureError):
+            jwt_utils.verify_token(token)
+        # Rejected by verify_token's own exp check, not by a fresh jose decode
+        self.assertEqual(jwt_utils._decode_cached.cache_info().hits, 1)
+
+    def test_verify_token_does_not_cache_failed_decodes(self):
+        """Test a token that fails verification is decoded again on its next use."""
+        with mock.patch.object(jwt_utils.jwt, "decode", wraps=jwt.decode) as decode:
+            for _ in range(2):
+                with self.assertRaises(JWTError):
+                    jwt_utils.verify_token("invalid_token_here")
+
+        self.assertEqual(decode.call_count, 2)
+        self.assertEqual(jwt_utils._decode_cached.cache_info().currsize, 0)
+
+    def test_verify_token_returns_independent_copies(self):
+        """Test mutating a returned payload does not leak into later results."""
+        token = jwt_utils.create_access_token(data={"sub": "1"})
+
+        payload = jwt_utils.verify_token(token)
+        payload["sub"] = "2"
+        payload["extra"] = True
+
+        self.assertEqual(jwt_utils.verify_token(token), {"sub": "1", "exp": mock.ANY})
+
+
 if __name__ == "__main__":
     unittest.main()
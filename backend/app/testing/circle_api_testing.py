@@ -1,104 +1,80 @@
 import unittest
-from typing import Generator
+from typing import List, Optional
 
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from passlib.context import CryptContext
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.orm import Session
 
-from app.main import app
-from app.database import Base, get_db
 from app.models.user import User
 from app.models.circle import Circle
 from app.models.associations import CircleMembership
+from app.testing._base import BaseAPITest, HASHED_PASSWORD
 
 
-TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-
-engine = create_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+# Built once so the membership checks reuse SQLAlchemy's compiled-statement cache
+MEMBERSHIP_QUERY = select(CircleMembership).where(
+    CircleMembership.user_id == bindparam("user_id"),
+    CircleMembership.circle_id == bindparam("circle_id"),
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-class TestCircleAPI(unittest.TestCase):
-    def setUp(self) -> None:
-        # Create tables for this test
-        Base.metadata.create_all(bind=engine)
-        self.db: Session = TestingSessionLocal()
-
-        # Override the app DB dependency to use the test session
-        def override_get_db() -> Generator[Session, None, None]:
-            yield self.db
-
-        app.dependency_overrides[get_db] = override_get_db
-        self.client = TestClient(app)
 
-        # Create test users
-        self.user1 = self.create_user_direct("user1", "password1", "User One")
-        self.user2 = self.create_user_direct("user2", "password2", "User Two")
-        self.user3 = self.create_user_direct("user3", "password3", "User Three")
-
-        # Login user1
-        self.token1 = self.login("user1", "password1")
-        self.token2 = self.login("user2", "password2")
-        self.token3 = self.login("user3", "password3")
-
-    def tearDown(self) -> None:
-        # Cleanup dependency overrides + DB
-        app.dependency_overrides.clear()
-        self.db.close()
-        Base.metadata.drop_all(bind=engine)
 
+class TestCircleAPI(BaseAPITest):
     # -----------
     # Helpers
     # -----------
 
-    def create_user_direct(self, username: str, password: str, name: str):
-        """Create user directly in database."""
-        user = User(
-            username=username,
-            password=pwd_context.hash(password),
-            name=name,
-            preferences=[]
-        )
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
-
-    def login(self, username: str, password: str) -> str:
-        """Login and return auth token."""
-        res = self.client.post(
-            "/login",
-            json={"username": username, "password": password}
+    @classmethod
+    def setup_test_data(cls, db: Session):
+        """Create the baseline users and circle and sign their tokens."""
+        users = [
+            User(username=username, password=HASHED_PASSWORD, name=name, preferences=[])
+            for username, name in (
+                ("user1", "User One"),
+                ("user2", "User Two"),
+                ("user3", "User Three"),
+            )
+        ]
+        db.add_all(users)
+        db.commit()
+
+        # The public "Test Circle" owned by user1 that most tests start from
+        circle = Circle(name="Test Circle", public=True, owner=users[0].id)
+        db.add(circle)
+        db.commit()
+        cls.user1, cls.user2, cls.user3 = users
+        cls.circle = circle
+
+        # Sign tokens in-process; /login itself is covered by the auth API tests.
+        # They only depend on the seeded users, so every test shares them.
+        cls.token1, cls.token2, cls.token3 = cls.mint_tokens(users)
+        cls.headers1, cls.headers2, cls.headers3 = (
+            cls.get_auth_headers(token) for token in (cls.token1, cls.token2, cls.token3)
         )
-        return res.json()["access_token"]
-
-    def get_auth_headers(self, token: str) -> dict:
-        """Get authorization headers."""
-        return {"Authorization": f"Bearer {token}"}
 
     def create_circle_direct(self, name: str, public: bool, owner_id: int) -> Circle:
         """Create circle directly in database."""
         circle = Circle(name=name, public=public, owner=owner_id)
         self.db.add(circle)
         self.db.commit()
-        self.db.refresh(circle)
         return circle
 
-    def add_member_direct(self, user_id: int, circle_id: int):
+    def get_membership(self, user_id: int, circle_id: int) -> Optional[CircleMembership]:
+        """Return the user's membership row for the circle, if any."""
+        return self.db.scalars(
+            MEMBERSHIP_QUERY, {"user_id": user_id, "circle_id": circle_id}
+        ).one_or_none()
+
+    def add_member_direct(self, user_id: int, circle_id: int) -> None:
         """Add member to circle directly in database."""
-        membership = CircleMembership(user_id=user_id, circle_id=circle_id)
-        self.db.add(membership)
+        self.add_members_bulk([user_id], circle_id)
+
+    def add_members_bulk(self, user_ids: List[int], circle_id: int) -> None:
+        """Add several members to circle directly in database with one commit."""
+        # Plain rows with no ORM behaviour to exercise, so skip the unit of work
+        self.db.execute(
+            insert(CircleMembership),
+            [{"user_id": user_id, "circle_id": circle_id} for user_id in user_ids],
+        )
         self.db.commit()
-        self.db.refresh(membership)
-        return membership
 
     # -----------
     # Tests - Create Circle
@@ -109,7 +85,7 @@ class TestCircleAPI(unittest.TestCase):
         res = self.client.post(
             "/circles",
             json={"name": "Test Circle", "public": True},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
 
@@ -124,7 +100,7 @@ class TestCircleAPI(unittest.TestCase):
         res = self.client.post(
             "/circles",
             json={"name": "Private Circle", "public": False},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
 
@@ -136,16 +112,13 @@ class TestCircleAPI(unittest.TestCase):
         res = self.client.post(
             "/circles",
             json={"name": "Auto Member Circle", "public": True},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
         circle_id = res.json()["id"]
 
         # Verify owner is a member
-        membership = self.db.query(CircleMembership).filter(
-            CircleMembership.user_id == self.user1.id,
-            CircleMembership.circle_id == circle_id
-        ).first()
+        membership = self.get_membership(self.user1.id, circle_id)
         self.assertIsNotNone(membership)
 
     # -----------
@@ -154,12 +127,12 @@ class TestCircleAPI(unittest.TestCase):
 
     def test_get_all_circles(self):
         """Test getting all circles."""
-        self.create_circle_direct("Circle 1", True, self.user1.id)
+        # Alongside the baseline public circle owned by user1
         self.create_circle_direct("Circle 2", False, self.user2.id)
 
         res = self.client.get(
             "/circles",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
@@ -169,11 +142,11 @@ class TestCircleAPI(unittest.TestCase):
 
     def test_get_circle_by_id(self):
         """Test getting a specific circle by ID."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
 
         res = self.client.get(
             f"/circles/{circle.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
@@ -186,7 +159,7 @@ class TestCircleAPI(unittest.TestCase):
         """Test getting a circle that doesn't exist returns 404."""
         res = self.client.get(
             "/circles/99999",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -201,7 +174,7 @@ class TestCircleAPI(unittest.TestCase):
         res = self.client.put(
             f"/circles/{circle.id}",
             json={"name": "New Name", "public": False},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
@@ -216,7 +189,7 @@ class TestCircleAPI(unittest.TestCase):
         res = self.client.put(
             f"/circles/{circle.id}",
             json={"name": "Updated Name"},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
@@ -226,12 +199,12 @@ class TestCircleAPI(unittest.TestCase):
 
     def test_update_circle_as_non_owner_returns_403(self):
         """Test non-owner cannot update circle."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
 
         res = self.client.put(
             f"/circles/{circle.id}",
             json={"name": "Hacked Name"},
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
@@ -245,7 +218,7 @@ class TestCircleAPI(unittest.TestCase):
 
         res = self.client.delete(
             f"/circles/{circle.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
@@ -255,11 +228,11 @@ class TestCircleAPI(unittest.TestCase):
 
     def test_delete_circle_as_non_owner_returns_403(self):
         """Test non-owner cannot delete circle."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
 
         res = self.client.delete(
             f"/circles/{circle.id}",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
@@ -273,15 +246,12 @@ class TestCircleAPI(unittest.TestCase):
 
         res = self.client.post(
             f"/circles/{circle.id}/join",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         # Verify user2 is now a member
-        membership = self.db.query(CircleMembership).filter(
-            CircleMembership.user_id == self.user2.id,
-            CircleMembership.circle_id == circle.id
-        ).first()
+        membership = self.get_membership(self.user2.id, circle.id)
         self.assertIsNotNone(membership)
 
     def test_join_private_circle_returns_403(self):
@@ -290,7 +260,7 @@ class TestCircleAPI(unittest.TestCase):
 
         res = self.client.post(
             f"/circles/{circle.id}/join",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
@@ -301,7 +271,7 @@ class TestCircleAPI(unittest.TestCase):
 
         res = self.client.post(
             f"/circles/{circle.id}/join",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
 
@@ -315,34 +285,31 @@ class TestCircleAPI(unittest.TestCase):
 
         res = self.client.post(
             f"/circles/{circle.id}/join/{self.user2.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         # Verify user2 is a member
-        membership = self.db.query(CircleMembership).filter(
-            CircleMembership.user_id == self.user2.id,
-            CircleMembership.circle_id == circle.id
-        ).first()
+        membership = self.get_membership(self.user2.id, circle.id)
         self.assertIsNotNone(membership)
 
     def test_add_member_as_non_owner_returns_403(self):
         """Test non-owner cannot add members."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
 
         res = self.client.post(
             f"/circles/{circle.id}/join/{self.user3.id}",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
     def test_add_nonexistent_user_returns_404(self):
         """Test adding a nonexistent user returns 404."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
 
         res = self.client.post(
             f"/circles/{circle.id}/join/99999",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -352,40 +319,37 @@ class TestCircleAPI(unittest.TestCase):
 
     def test_leave_circle_as_member(self):
         """Test member can leave a circle."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
         self.add_member_direct(self.user2.id, circle.id)
 
         res = self.client.post(
             f"/circles/{circle.id}/leave",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         # Verify user2 is no longer a member
-        membership = self.db.query(CircleMembership).filter(
-            CircleMembership.user_id == self.user2.id,
-            CircleMembership.circle_id == circle.id
-        ).first()
+        membership = self.get_membership(self.user2.id, circle.id)
         self.assertIsNone(membership)
 
     def test_owner_cannot_leave_own_circle(self):
         """Test owner cannot leave their own circle."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
         self.add_member_direct(self.user1.id, circle.id)
 
         res = self.client.post(
             f"/circles/{circle.id}/leave",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
 
     def test_leave_circle_not_member_returns_400(self):
         """Test leaving a circle as a non-member returns 400."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
 
         res = self.client.post(
             f"/circles/{circle.id}/leave",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
 
@@ -395,42 +359,38 @@ class TestCircleAPI(unittest.TestCase):
 
     def test_kick_member_as_owner(self):
         """Test owner can kick members from circle."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
         self.add_member_direct(self.user2.id, circle.id)
 
         res = self.client.post(
             f"/circles/{circle.id}/kick/{self.user2.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         # Verify user2 is no longer a member
-        membership = self.db.query(CircleMembership).filter(
-            CircleMembership.user_id == self.user2.id,
-            CircleMembership.circle_id == circle.id
-        ).first()
+        membership = self.get_membership(self.user2.id, circle.id)
         self.assertIsNone(membership)
 
     def test_kick_member_as_non_owner_returns_403(self):
         """Test non-owner cannot kick members."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
-        self.add_member_direct(self.user2.id, circle.id)
-        self.add_member_direct(self.user3.id, circle.id)
+        circle = self.circle
+        self.add_members_bulk([self.user2.id, self.user3.id], circle.id)
 
         res = self.client.post(
             f"/circles/{circle.id}/kick/{self.user3.id}",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
     def test_owner_cannot_kick_self(self):
         """Test owner cannot kick themselves."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
         self.add_member_direct(self.user1.id, circle.id)
 
         res = self.client.post(
             f"/circles/{circle.id}/kick/{self.user1.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
 
@@ -440,14 +400,12 @@ class TestCircleAPI(unittest.TestCase):
 
     def test_get_circle_members(self):
         """Test getting all members of a circle."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
-        self.add_member_direct(self.user1.id, circle.id)
-        self.add_member_direct(self.user2.id, circle.id)
-        self.add_member_direct(self.user3.id, circle.id)
+        circle = self.circle
+        self.add_members_bulk([self.user1.id, self.user2.id, self.user3.id], circle.id)
 
         res = self.client.get(
             f"/circles/{circle.id}/members",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
@@ -464,7 +422,7 @@ class TestCircleAPI(unittest.TestCase):
 
         res = self.client.get(
             f"/circles/{circle.id}/members",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
@@ -477,11 +435,11 @@ class TestCircleAPI(unittest.TestCase):
 
     def test_get_circle_events(self):
         """Test getting events for a circle."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
+        circle = self.circle
 
         res = self.client.get(
             f"/circles/{circle.id}/events",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
@@ -493,35 +451,32 @@ class TestCircleAPI(unittest.TestCase):
     # Tests - Authentication
     # -----------
 
+    # Every circle route; {circle_id}/{user_id} are filled in by the test
+    AUTH_REQUIRED_ENDPOINTS = [
+        ("GET", "/circles"),
+        ("GET", "/circles/{circle_id}"),
+        ("POST", "/circles"),
+        ("PUT", "/circles/{circle_id}"),
+        ("DELETE", "/circles/{circle_id}"),
+        ("POST", "/circles/{circle_id}/join"),
+        ("POST", "/circles/{circle_id}/join/{user_id}"),
+        ("POST", "/circles/{circle_id}/leave"),
+        ("POST", "/circles/{circle_id}/kick/{user_id}"),
+        ("GET", "/circles/{circle_id}/members"),
+        ("GET", "/circles/{circle_id}/events"),
+    ]
+
     def test_endpoints_require_authentication(self):
         """Test that all circle endpoints require authentication."""
-        circle = self.create_circle_direct("Test Circle", True, self.user1.id)
-
-        endpoints = [
-            ("GET", f"/circles"),
-            ("GET", f"/circles/{circle.id}"),
-            ("POST", "/circles"),
-            ("PUT", f"/circles/{circle.id}"),
-            ("DELETE", f"/circles/{circle.id}"),
-            ("POST", f"/circles/{circle.id}/join"),
-            ("POST", f"/circles/{circle.id}/join/{self.user2.id}"),
-            ("POST", f"/circles/{circle.id}/leave"),
-            ("POST", f"/circles/{circle.id}/kick/{self.user2.id}"),
-            ("GET", f"/circles/{circle.id}/members"),
-            ("GET", f"/circles/{circle.id}/events"),
-        ]
-
-        for method, endpoint in endpoints:
-            if method == "GET":
-                res = self.client.get(endpoint)
-            elif method == "POST":
-                res = self.client.post(endpoint, json={})
-            elif method == "PUT":
-                res = self.client.put(endpoint, json={})
-            elif method == "DELETE":
-                res = self.client.delete(endpoint)
-
-            self.assertEqual(res.status_code, 401, msg=f"Endpoint {method} {endpoint} should require auth")
+        circle = self.circle
+
+        for method, template in self.AUTH_REQUIRED_ENDPOINTS:
+            endpoint = template.format(circle_id=circle.id, user_id=self.user2.id)
+            with self.subTest(method=method, endpoint=endpoint):
+                res = self.client.request(
+                    method, endpoint, json={} if method in ("POST", "PUT") else None
+                )
+                self.assertEqual(res.status_code, 401, msg=f"Endpoint {method} {endpoint} should require auth")
 
 
 if __name__ == "__main__":
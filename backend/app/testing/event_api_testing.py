@@ -1,109 +1,97 @@
 import unittest
-from typing import Generator
 from datetime import datetime, timedelta
 
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from passlib.context import CryptContext
+import orjson
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
 
-from app.main import app
-from app.database import Base, get_db
 from app.models.user import User
 from app.models.event import Event, EventState
 from app.models.associations import EventOwnership
-
-
-TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-
-engine = create_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+from app.testing._base import BaseAPITest, HASHED_PASSWORD
+
+
+# Frozen once per run. Offsets of a day or more from the real clock keep the
+# app's upcoming/passed classification unambiguous for the whole run.
+_NOW = datetime.now()
+_START_FUTURE = _NOW + timedelta(days=1)
+_START_PAST = _NOW - timedelta(days=1)
+_RESCHEDULED_START = _NOW + timedelta(days=2)
+
+START_FUTURE = _START_FUTURE.isoformat()
+END_FUTURE = (_START_FUTURE + timedelta(hours=2)).isoformat()
+END_BEFORE_START_FUTURE = (_START_FUTURE - timedelta(hours=1)).isoformat()
+START_PAST = _START_PAST.isoformat()
+END_PAST = (_START_PAST + timedelta(hours=2)).isoformat()
+RESCHEDULED_START = _RESCHEDULED_START.isoformat()
+RESCHEDULED_END = (_RESCHEDULED_START + timedelta(hours=3)).isoformat()
+RESCHEDULED_END_BEFORE_START = (_RESCHEDULED_START - timedelta(hours=1)).isoformat()
+
+# Built once so the verification queries reuse SQLAlchemy's compiled-statement cache
+OWNERSHIP_QUERY = select(EventOwnership).where(
+    EventOwnership.user_id == bindparam("user_id"),
+    EventOwnership.event_id == bindparam("event_id"),
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
+EVENT_QUERY = select(Event).where(Event.id == bindparam("event_id"))
 
-class TestEventAPI(unittest.TestCase):
-    def setUp(self) -> None:
-        # Create tables for this test
-        Base.metadata.create_all(bind=engine)
-        self.db: Session = TestingSessionLocal()
-
-        # Override the app DB dependency to use the test session
-        def override_get_db() -> Generator[Session, None, None]:
-            yield self.db
-
-        app.dependency_overrides[get_db] = override_get_db
-        self.client = TestClient(app)
-
-        # Create test users
-        self.user1 = self.create_user_direct("user1", "password1", "User One")
-        self.user2 = self.create_user_direct("user2", "password2", "User Two")
-
-        # Login users
-        self.token1 = self.login("user1", "password1")
-        self.token2 = self.login("user2", "password2")
+# The minimal upcoming-event payload several create tests post unchanged
+BASE_EVENT_BODY = orjson.dumps(
+    {"name": "Test Event", "start_at": START_FUTURE, "end_at": END_FUTURE}
+)
 
-    def tearDown(self) -> None:
-        # Cleanup dependency overrides + DB
-        app.dependency_overrides.clear()
-        self.db.close()
-        Base.metadata.drop_all(bind=engine)
 
+class TestEventAPI(BaseAPITest):
     # -----------
     # Helpers
     # -----------
 
-    def create_user_direct(self, username: str, password: str, name: str):
-        """Create user directly in database."""
-        user = User(
-            username=username,
-            password=pwd_context.hash(password),
-            name=name,
-            preferences=[]
+    @classmethod
+    def setup_test_data(cls, db: Session):
+        """Create the two users and user1's events and sign their tokens."""
+        cls.user1 = User(username="user1", password=HASHED_PASSWORD, name="User One", preferences=[])
+        cls.user2 = User(username="user2", password=HASHED_PASSWORD, name="User Two", preferences=[])
+        db.add_all([cls.user1, cls.user2])
+        db.commit()
+
+        # One upcoming event per fixture the tests use, all owned by user1,
+        # keyed by (name, description). Tests that mutate them are undone
+        # by their rollback like any other write.
+        cls.events = {
+            (name, description): Event(
+                name=name,
+                description=description,
+                start_at=_START_FUTURE,
+                end_at=_START_FUTURE + timedelta(hours=2),
+                state=EventState.upcoming,
+            )
+            for name, description in (
+                ("Test Event", "Description"),
+                ("Old Name", "Old Desc"),
+                ("Old Name", "Original Desc"),
+                ("To Delete", "Description"),
+            )
+        }
+        db.add_all(cls.events.values())
+        db.flush()
+        db.add_all(
+            EventOwnership(user_id=cls.user1.id, event_id=event.id)
+            for event in cls.events.values()
         )
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+        db.commit()
 
-    def login(self, username: str, password: str) -> str:
-        """Login and return auth token."""
-        res = self.client.post(
-            "/login",
-            json={"username": username, "password": password}
-        )
-        return res.json()["access_token"]
-
-    def get_auth_headers(self, token: str) -> dict:
-        """Get authorization headers."""
-        return {"Authorization": f"Bearer {token}"}
-
-    def create_event_direct(self, name: str, description: str, start_at: datetime, end_at: datetime, state: EventState) -> Event:
-        """Create event directly in database."""
-        event = Event(
-            name=name,
-            description=description,
-            start_at=start_at,
-            end_at=end_at,
-            state=state
-        )
-        self.db.add(event)
-        self.db.commit()
-        self.db.refresh(event)
-        return event
-
-    def add_event_owner_direct(self, user_id: int, event_id: int):
-        """Add event owner directly in database."""
-        ownership = EventOwnership(user_id=user_id, event_id=event_id)
-        self.db.add(ownership)
-        self.db.commit()
-        self.db.refresh(ownership)
-        return ownership
+        # Sign tokens in-process; /login itself is covered by the auth API tests
+        cls.token1, cls.token2 = cls.mint_tokens([cls.user1, cls.user2])
+        cls.headers1 = cls.get_auth_headers(cls.token1)
+        cls.headers2 = cls.get_auth_headers(cls.token2)
+        cls.json_headers1 = {**cls.headers1, "content-type": "application/json"}
+
+    def assert_fields(self, body: dict, expected: dict) -> None:
+        """Assert body has every expected key/value, reporting all mismatches at once."""
+        self.assertEqual({key: body.get(key) for key in expected}, expected)
+
+    def json(self, res):
+        """Decode a JSON response body with orjson."""
+        return orjson.loads(res.content)
 
     # -----------
     # Tests - Create Event
@@ -111,125 +99,90 @@ class TestEventAPI(unittest.TestCase):
 
     def test_create_event_returns_201(self):
         """Test creating an event returns 201 and event data."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
         res = self.client.post(
             "/events",
             json={
                 "name": "Test Event",
                 "description": "A test event",
-                "start_at": start.isoformat(),
-                "end_at": end.isoformat()
+                "start_at": START_FUTURE,
+                "end_at": END_FUTURE
             },
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
 
-        body = res.json()
-        self.assertEqual(body["name"], "Test Event")
-        self.assertEqual(body["description"], "A test event")
-        self.assertEqual(body["state"], "upcoming")
+        body = self.json(res)
+        self.assert_fields(body, {"name": "Test Event", "description": "A test event", "state": "upcoming"})
         self.assertIn("id", body)
 
     def test_create_event_without_description(self):
         """Test creating an event without description."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
         res = self.client.post(
             "/events",
-            json={
-                "name": "Test Event",
-                "start_at": start.isoformat(),
-                "end_at": end.isoformat()
-            },
-            headers=self.get_auth_headers(self.token1)
+            content=BASE_EVENT_BODY,
+            headers=self.json_headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertIsNone(body["description"])
 
     def test_create_event_with_end_before_start_returns_400(self):
         """Test creating event with end before start returns 400."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start - timedelta(hours=1)  # End before start
-
         res = self.client.post(
             "/events",
             json={
                 "name": "Invalid Event",
-                "start_at": start.isoformat(),
-                "end_at": end.isoformat()
+                "start_at": START_FUTURE,
+                "end_at": END_BEFORE_START_FUTURE  # End before start
             },
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
 
     def test_create_event_creator_auto_added_as_owner(self):
         """Test that event creator is automatically added as owner."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
         res = self.client.post(
             "/events",
-            json={
-                "name": "Test Event",
-                "start_at": start.isoformat(),
-                "end_at": end.isoformat()
-            },
-            headers=self.get_auth_headers(self.token1)
+            content=BASE_EVENT_BODY,
+            headers=self.json_headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
-        event_id = res.json()["id"]
+        event_id = self.json(res)["id"]
 
         # Verify creator is an owner
-        ownership = self.db.query(EventOwnership).filter(
-            EventOwnership.user_id == self.user1.id,
-            EventOwnership.event_id == event_id
-        ).first()
+        ownership = self.db.scalars(
+            OWNERSHIP_QUERY, {"user_id": self.user1.id, "event_id": event_id}
+        ).one_or_none()
         self.assertIsNotNone(ownership)
 
     def test_create_event_state_set_to_upcoming_for_future_event(self):
         """Test event state is set to upcoming for future events."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
         res = self.client.post(
             "/events",
             json={
                 "name": "Future Event",
-                "start_at": start.isoformat(),
-                "end_at": end.isoformat()
+                "start_at": START_FUTURE,
+                "end_at": END_FUTURE
             },
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
-        self.assertEqual(res.json()["state"], "upcoming")
+        self.assertEqual(self.json(res)["state"], "upcoming")
 
     def test_create_event_state_set_to_passed_for_past_event(self):
         """Test event state is set to passed for past events."""
-        now = datetime.now()
-        start = now - timedelta(days=1)
-        end = start + timedelta(hours=2)
-
         res = self.client.post(
             "/events",
             json={
                 "name": "Past Event",
-                "start_at": start.isoformat(),
-                "end_at": end.isoformat()
+                "start_at": START_PAST,
+                "end_at": END_PAST
             },
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
-        self.assertEqual(res.json()["state"], "passed")
+        self.assertEqual(self.json(res)["state"], "passed")
 
     # -----------
     # Tests - Get Event
@@ -237,36 +190,24 @@ class TestEventAPI(unittest.TestCase):
 
     def test_get_event_by_id_as_owner(self):
         """Test owner can get event details."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Test Event", "Description", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
+        event = self.events["Test Event", "Description"]
 
         res = self.client.get(
             f"/events/{event.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
-        body = res.json()
-        self.assertEqual(body["id"], event.id)
-        self.assertEqual(body["name"], "Test Event")
-        self.assertEqual(body["description"], "Description")
+        body = self.json(res)
+        self.assert_fields(body, {"id": event.id, "name": "Test Event", "description": "Description"})
 
     def test_get_event_by_id_as_non_owner_returns_403(self):
         """Test non-owner cannot get event details."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Test Event", "Description", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
+        event = self.events["Test Event", "Description"]
 
         res = self.client.get(
             f"/events/{event.id}",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
@@ -274,7 +215,7 @@ class TestEventAPI(unittest.TestCase):
         """Test getting event that doesn't exist returns 404."""
         res = self.client.get(
             "/events/99999",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -284,122 +225,85 @@ class TestEventAPI(unittest.TestCase):
 
     def test_update_event_as_owner(self):
         """Test owner can update their event."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Old Name", "Old Desc", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
-
-        new_start = now + timedelta(days=2)
-        new_end = new_start + timedelta(hours=3)
+        event = self.events["Old Name", "Old Desc"]
 
         res = self.client.put(
             f"/events/{event.id}",
             json={
                 "name": "New Name",
                 "description": "New Desc",
-                "start_at": new_start.isoformat(),
-                "end_at": new_end.isoformat()
+                "start_at": RESCHEDULED_START,
+                "end_at": RESCHEDULED_END
             },
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
-        body = res.json()
-        self.assertEqual(body["name"], "New Name")
-        self.assertEqual(body["description"], "New Desc")
+        body = self.json(res)
+        self.assert_fields(body, {"name": "New Name", "description": "New Desc"})
 
     def test_update_event_partial_update(self):
         """Test partial update of event (only name)."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Old Name", "Original Desc", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
+        event = self.events["Old Name", "Original Desc"]
 
         res = self.client.put(
             f"/events/{event.id}",
             json={"name": "Updated Name"},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
-        body = res.json()
-        self.assertEqual(body["name"], "Updated Name")
-        self.assertEqual(body["description"], "Original Desc")  # Should remain unchanged
+        body = self.json(res)
+        # description should remain unchanged
+        self.assert_fields(body, {"name": "Updated Name", "description": "Original Desc"})
 
     def test_update_event_state(self):
         """Test updating event state."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Test Event", "Description", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
+        event = self.events["Test Event", "Description"]
 
         res = self.client.put(
             f"/events/{event.id}",
             json={"state": "passed"},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
-        body = res.json()
+        body = self.json(res)
         self.assertEqual(body["state"], "passed")
 
     def test_update_event_invalid_state_returns_400(self):
         """Test updating event with invalid state returns 400."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Test Event", "Description", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
+        event = self.events["Test Event", "Description"]
 
         res = self.client.put(
             f"/events/{event.id}",
             json={"state": "invalid_state"},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
 
     def test_update_event_as_non_owner_returns_403(self):
         """Test non-owner cannot update event."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Test Event", "Description", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
+        event = self.events["Test Event", "Description"]
 
         res = self.client.put(
             f"/events/{event.id}",
             json={"name": "Hacked Name"},
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
     def test_update_event_with_end_before_start_returns_400(self):
         """Test updating event with end before start returns 400."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Test Event", "Description", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
-
-        new_start = now + timedelta(days=2)
-        new_end = new_start - timedelta(hours=1)  # End before start
+        event = self.events["Test Event", "Description"]
 
         res = self.client.put(
             f"/events/{event.id}",
             json={
-                "start_at": new_start.isoformat(),
-                "end_at": new_end.isoformat()
+                "start_at": RESCHEDULED_START,
+                "end_at": RESCHEDULED_END_BEFORE_START  # End before start
             },
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
 
@@ -409,35 +313,25 @@ class TestEventAPI(unittest.TestCase):
 
     def test_delete_event_as_owner(self):
         """Test owner can delete their event."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("To Delete", "Description", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
+        event = self.events["To Delete", "Description"]
 
         res = self.client.delete(
             f"/events/{event.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         # Verify event is deleted
-        deleted_event = self.db.query(Event).filter(Event.id == event.id).first()
+        deleted_event = self.db.scalars(EVENT_QUERY, {"event_id": event.id}).one_or_none()
         self.assertIsNone(deleted_event)
 
     def test_delete_event_as_non_owner_returns_403(self):
         """Test non-owner cannot delete event."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Test Event", "Description", start, end, EventState.UPCOMING)
-        self.add_event_owner_direct(self.user1.id, event.id)
+        event = self.events["Test Event", "Description"]
 
         res = self.client.delete(
             f"/events/{event.id}",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
@@ -445,7 +339,7 @@ class TestEventAPI(unittest.TestCase):
         """Test deleting nonexistent event returns 404."""
         res = self.client.delete(
             "/events/99999",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -453,32 +347,25 @@ class TestEventAPI(unittest.TestCase):
     # Tests - Authentication
     # -----------
 
+    # Every event route; {event_id} is filled in by the test
+    AUTH_REQUIRED_ENDPOINTS = [
+        ("GET", "/events/{event_id}"),
+        ("POST", "/events"),
+        ("PUT", "/events/{event_id}"),
+        ("DELETE", "/events/{event_id}"),
+    ]
+
     def test_endpoints_require_authentication(self):
         """Test that all event endpoints require authentication."""
-        now = datetime.now()
-        start = now + timedelta(days=1)
-        end = start + timedelta(hours=2)
-
-        event = self.create_event_direct("Test Event", "Description", start, end, EventState.UPCOMING)
-
-        endpoints = [
-            ("GET", f"/events/{event.id}"),
-            ("POST", "/events"),
-            ("PUT", f"/events/{event.id}"),
-            ("DELETE", f"/events/{event.id}"),
-        ]
-
-        for method, endpoint in endpoints:
-            if method == "GET":
-                res = self.client.get(endpoint)
-            elif method == "POST":
-                res = self.client.post(endpoint, json={})
-            elif method == "PUT":
-                res = self.client.put(endpoint, json={})
-            elif method == "DELETE":
-                res = self.client.delete(endpoint)
-
-            self.assertEqual(res.status_code, 401, msg=f"Endpoint {method} {endpoint} should require auth")
+        event = self.events["Test Event", "Description"]
+
+        for method, template in self.AUTH_REQUIRED_ENDPOINTS:
+            endpoint = template.format(event_id=event.id)
+            with self.subTest(method=method, endpoint=endpoint):
+                res = self.client.request(
+                    method, endpoint, json={} if method in ("POST", "PUT") else None
+                )
+                self.assertEqual(res.status_code, 401, msg=f"Endpoint {method} {endpoint} should require auth")
 
 
 if __name__ == "__main__":
@@ -1,121 +1,62 @@
 import unittest
-from typing import Generator
+from typing import Optional
 
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from passlib.context import CryptContext
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
 
-from app.main import app
-from app.database import Base, get_db
 from app.models.user import User
 from app.models.associations import Friends, FriendRequests
+from app.testing._base import BaseAPITest, HASHED_PASSWORD
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-
-engine = create_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-class TestFriendRequestAPI(unittest.TestCase):
-    def setUp(self) -> None:
-        # Create tables for this test
-        Base.metadata.create_all(bind=engine)
-        self.db: Session = TestingSessionLocal()
-
-        # Override the app DB dependency to use the test session
-        def override_get_db() -> Generator[Session, None, None]:
-            yield self.db
-
-        app.dependency_overrides[get_db] = override_get_db
-        self.client = TestClient(app)
-
-        # Create test users
-        self.setup_test_users()
-
-    def tearDown(self) -> None:
-        # Cleanup dependency overrides + DB
-        app.dependency_overrides.clear()
-        self.db.close()
-        Base.metadata.drop_all(bind=engine)
 
+class TestFriendRequestAPI(BaseAPITest):
     # -----------
     # Helpers
     # -----------
 
-    def setup_test_users(self):
+    @classmethod
+    def setup_test_data(cls, db: Session):
         """Create test users and get auth tokens."""
         # Create user 1
-        self.user1 = User(
+        cls.user1 = User(
             username="user1",
-            password=pwd_context.hash("password123"),
+            password=HASHED_PASSWORD,
             name="User One",
             preferences=[]
         )
-        self.db.add(self.user1)
 
         # Create user 2
-        self.user2 = User(
+        cls.user2 = User(
             username="user2",
-            password=pwd_context.hash("password123"),
+            password=HASHED_PASSWORD,
             name="User Two",
             preferences=[]
         )
-        self.db.add(self.user2)
 
         # Create user 3
-        self.user3 = User(
+        cls.user3 = User(
             username="user3",
-            password=pwd_context.hash("password123"),
+            password=HASHED_PASSWORD,
             name="User Three",
             preferences=[]
         )
-        self.db.add(self.user3)
-
-        self.db.commit()
-        self.db.refresh(self.user1)
-        self.db.refresh(self.user2)
-        self.db.refresh(self.user3)
-
-        # Login and store tokens
-        login_res1 = self.client.post("/login", json={"username": "user1", "password": "password123"})
-        self.token1 = login_res1.json()["access_token"]
-
-        login_res2 = self.client.post("/login", json={"username": "user2", "password": "password123"})
-        self.token2 = login_res2.json()["access_token"]
-
-        login_res3 = self.client.post("/login", json={"username": "user3", "password": "password123"})
-        self.token3 = login_res3.json()["access_token"]
-
-    def get_auth_headers(self, token: str) -> dict:
-        """Return Authorization header for authenticated requests."""
-        return {"Authorization": f"Bearer {token}"}
-
-    def create_friendship(self, user1_id: int, user2_id: int):
-        """Create a friendship directly in database."""
-        friendship = Friends(user1_id=user1_id, user2_id=user2_id)
-        self.db.add(friendship)
-        self.db.commit()
-        return friendship
-
-    def create_friend_request(self, outgoing_user_id: int, incoming_user_id: int, status: str = "pending"):
-        """Create a friend request directly in database."""
-        request = FriendRequests(
-            outgoing_user_id=outgoing_user_id,
-            incoming_user_id=incoming_user_id,
-            status=status
+
+        db.add_all([cls.user1, cls.user2, cls.user3])
+        db.commit()
+
+        # Sign tokens in-process; /login itself is covered by the auth API tests
+        cls.token1, cls.token2, cls.token3 = cls.mint_tokens([cls.user1, cls.user2, cls.user3])
+        cls.headers1, cls.headers2, cls.headers3 = (
+            cls.get_auth_headers(token) for token in (cls.token1, cls.token2, cls.token3)
         )
-        self.db.add(request)
-        self.db.commit()
-        self.db.refresh(request)
-        return request
+
+    def get_friendship(self, user_a_id: int, user_b_id: int) -> Optional[Friends]:
+        """Return the friendship between two users, stored in either direction."""
+        return self.db.query(Friends).filter(
+            tuple_(Friends.user1_id, Friends.user2_id).in_(
+                [(user_a_id, user_b_id), (user_b_id, user_a_id)]
+            )
+        ).first()
 
     # -----------
     # Tests - Create Friend Request
@@ -126,7 +67,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests",
             json={"recipient_id": self.user2.id},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 201, msg=res.text)
 
@@ -140,7 +81,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests",
             json={"recipient_id": 99999},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -149,7 +90,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests",
             json={"recipient_id": self.user1.id},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
         self.assertIn("yourself", res.json()["detail"])
@@ -162,7 +103,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests",
             json={"recipient_id": self.user2.id},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
         self.assertIn("Already friends", res.json()["detail"])
@@ -176,7 +117,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests",
             json={"recipient_id": self.user2.id},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
         self.assertIn("already sent", res.json()["detail"])
@@ -190,7 +131,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests",
             json={"recipient_id": self.user2.id},
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
         self.assertIn("already sent you", res.json()["detail"])
@@ -208,16 +149,13 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests/accept",
             json={"sender_id": self.user1.id},
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
         self.assertIn("accepted", res.json()["message"])
 
         # Verify friendship exists in database
-        friendship = self.db.query(Friends).filter(
-            ((Friends.user1_id == self.user1.id) & (Friends.user2_id == self.user2.id)) |
-            ((Friends.user1_id == self.user2.id) & (Friends.user2_id == self.user1.id))
-        ).first()
+        friendship = self.get_friendship(self.user1.id, self.user2.id)
         self.assertIsNotNone(friendship)
 
     def test_accept_nonexistent_friend_request(self):
@@ -225,7 +163,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests/accept",
             json={"sender_id": self.user1.id},
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -237,7 +175,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         res = self.client.post(
             "/friend-requests/accept",
             json={"sender_id": self.user1.id},
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
         self.assertIn("not pending", res.json()["detail"])
@@ -254,12 +192,13 @@ class TestFriendRequestAPI(unittest.TestCase):
         # User2 rejects
         res = self.client.post(
             f"/friend-requests/{request.id}/reject",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
         self.assertIn("rejected", res.json()["message"])
 
-        # Verify status updated
+        # Verify status updated; refresh re-reads the row rather than the object
+        # the app already changed in this shared session
         self.db.refresh(request)
         self.assertEqual(request.status, "rejected")
 
@@ -271,7 +210,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         # User3 tries to reject (not the recipient)
         res = self.client.post(
             f"/friend-requests/{request.id}/reject",
-            headers=self.get_auth_headers(self.token3)
+            headers=self.headers3
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
@@ -279,7 +218,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         """Test rejecting non-existent friend request returns 404."""
         res = self.client.post(
             "/friend-requests/99999/reject",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -295,13 +234,13 @@ class TestFriendRequestAPI(unittest.TestCase):
         # User1 cancels
         res = self.client.delete(
             f"/friend-requests/{request.id}/cancel",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
         self.assertIn("cancelled", res.json()["message"])
 
         # Verify request deleted
-        deleted_request = self.db.query(FriendRequests).filter(FriendRequests.id == request.id).first()
+        deleted_request = self.db.get(FriendRequests, request.id)
         self.assertIsNone(deleted_request)
 
     def test_cancel_friend_request_not_sender(self):
@@ -312,7 +251,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         # User2 tries to cancel (not the sender)
         res = self.client.delete(
             f"/friend-requests/{request.id}/cancel",
-            headers=self.get_auth_headers(self.token2)
+            headers=self.headers2
         )
         self.assertEqual(res.status_code, 403, msg=res.text)
 
@@ -320,7 +259,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         """Test canceling non-existent friend request returns 404."""
         res = self.client.delete(
             "/friend-requests/99999/cancel",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -336,23 +275,20 @@ class TestFriendRequestAPI(unittest.TestCase):
         # User1 unfriends User2
         res = self.client.delete(
             f"/friends/{self.user2.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
         self.assertIn("removed", res.json()["message"])
 
         # Verify friendship deleted
-        friendship = self.db.query(Friends).filter(
-            ((Friends.user1_id == self.user1.id) & (Friends.user2_id == self.user2.id)) |
-            ((Friends.user1_id == self.user2.id) & (Friends.user2_id == self.user1.id))
-        ).first()
+        friendship = self.get_friendship(self.user1.id, self.user2.id)
         self.assertIsNone(friendship)
 
     def test_unfriend_nonexistent_user(self):
         """Test unfriending non-existent user returns 404."""
         res = self.client.delete(
             "/friends/99999",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 404, msg=res.text)
 
@@ -360,7 +296,7 @@ class TestFriendRequestAPI(unittest.TestCase):
         """Test cannot unfriend user you're not friends with."""
         res = self.client.delete(
             f"/friends/{self.user2.id}",
-            headers=self.get_auth_headers(self.token1)
+            headers=self.headers1
         )
         self.assertEqual(res.status_code, 400, msg=res.text)
         self.assertIn("not friends", res.json()["detail"])
@@ -383,13 +319,9 @@ class TestFriendRequestAPI(unittest.TestCase):
         ]
 
         for method, endpoint, json_data in endpoints_and_methods:
-            if method == "POST":
-                res = self.client.post(endpoint, json=json_data)
-            else:
-                res = self.client.delete(endpoint)
-
-            self.assertEqual(res.status_code, 401, msg=f"Endpoint {method} {endpoint} should require auth")
-
+            with self.subTest(method=method, endpoint=endpoint):
+                res = self.client.request(method, endpoint, json=json_data)
+                self.assertEqual(res.status_code, 401, msg=f"Endpoint {method} {endpoint} should require auth")
 
 if __name__ == "__main__":
     unittest.main()
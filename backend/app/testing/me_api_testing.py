@@ -1,132 +1,59 @@
 import unittest
-from typing import Generator
 from datetime import datetime, timedelta
 
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from passlib.context import CryptContext
+from sqlalchemy.orm import Session
 
-from app.main import app
-from app.database import Base, get_db
 from app.models.user import User
 from app.models.circle import Circle
 from app.models.event import Event, EventState
 from app.models.associations import Friends, CircleMembership, EventOwnership, FriendRequests
+from app.testing._base import BaseAPITest, HASHED_PASSWORD
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-
-engine = create_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-class TestMeAPI(unittest.TestCase):
-    def setUp(self) -> None:
-        # Create tables for this test
-        Base.metadata.create_all(bind=engine)
-        self.db: Session = TestingSessionLocal()
-
-        # Override the app DB dependency to use the test session
-        def override_get_db() -> Generator[Session, None, None]:
-            yield self.db
-
-        app.dependency_overrides[get_db] = override_get_db
-        self.client = TestClient(app)
-
-        # Create test users
-        self.setup_test_data()
-
-    def tearDown(self) -> None:
-        # Cleanup dependency overrides + DB
-        app.dependency_overrides.clear()
-        self.db.close()
-        Base.metadata.drop_all(bind=engine)
 
+class TestMeAPI(BaseAPITest):
     # -----------
     # Helpers
     # -----------
 
-    def setup_test_data(self):
+    @classmethod
+    def setup_test_data(cls, db: Session):
         """Create test users and get auth token for main user."""
         # Create main test user
-        self.main_user = User(
+        cls.main_user = User(
             username="mainuser",
-            password=pwd_context.hash("password123"),
+            password=HASHED_PASSWORD,
             name="Main User",
             preferences=["coding", "music"]
         )
-        self.db.add(self.main_user)
 
         # Create friend users
-        self.friend1 = User(
+        cls.friend1 = User(
             username="friend1",
-            password=pwd_context.hash("password123"),
+            password=HASHED_PASSWORD,
             name="Friend One",
             preferences=[]
         )
-        self.friend2 = User(
+        cls.friend2 = User(
             username="friend2",
-            password=pwd_context.hash("password123"),
+            password=HASHED_PASSWORD,
             name="Friend Two",
             preferences=[]
         )
-        self.db.add(self.friend1)
-        self.db.add(self.friend2)
 
         # Create non-friend user
-        self.other_user = User(
+        cls.other_user = User(
             username="otheruser",
-            password=pwd_context.hash("password123"),
+            password=HASHED_PASSWORD,
             name="Other User",
             preferences=[]
         )
-        self.db.add(self.other_user)
-
-        self.db.commit()
-        self.db.refresh(self.main_user)
-        self.db.refresh(self.friend1)
-        self.db.refresh(self.friend2)
-        self.db.refresh(self.other_user)
-
-        # Login and store token
-        login_res = self.client.post(
-            "/login",
-            json={"username": "mainuser", "password": "password123"}
-        )
-        self.auth_token = login_res.json()["access_token"]
-
-    def get_auth_headers(self) -> dict:
-        """Return Authorization header for authenticated requests."""
-        return {"Authorization": f"Bearer {self.auth_token}"}
-
-    def create_friendship(self, user1_id: int, user2_id: int):
-        """Create a friendship between two users."""
-        friendship = Friends(user1_id=user1_id, user2_id=user2_id)
-        self.db.add(friendship)
-        self.db.commit()
-        return friendship
-
-    def create_circle(self, name: str, owner_id: int, public: bool = False):
-        """Create a circle."""
-        circle = Circle(name=name, owner=owner_id, public=public)
-        self.db.add(circle)
-        self.db.commit()
-        self.db.refresh(circle)
-        return circle
-
-    def add_to_circle(self, user_id: int, circle_id: int):
-        """Add user to circle."""
-        membership = CircleMembership(user_id=user_id, circle_id=circle_id)
-        self.db.add(membership)
-        self.db.commit()
-        return membership
+
+        db.add_all([cls.main_user, cls.friend1, cls.friend2, cls.other_user])
+        db.commit()
+
+        # Sign the token in-process; /login itself is covered by the auth API tests
+        cls.auth_token, = cls.mint_tokens([cls.main_user])
+        cls.auth_headers = cls.get_auth_headers(cls.auth_token)
 
     def create_event(self, name: str, description: str = None):
         """Create an event."""
@@ -135,31 +62,9 @@ class TestMeAPI(unittest.TestCase):
             description=description,
             start_at=datetime.now() + timedelta(days=1),
             end_at=datetime.now() + timedelta(days=2),
-            state=EventState.UPCOMING
+            state=EventState.upcoming
         )
-        self.db.add(event)
-        self.db.commit()
-        self.db.refresh(event)
-        return event
-
-    def add_event_ownership(self, user_id: int, event_id: int):
-        """Add event ownership."""
-        ownership = EventOwnership(user_id=user_id, event_id=event_id)
-        self.db.add(ownership)
-        self.db.commit()
-        return ownership
-
-    def create_friend_request(self, outgoing_user_id: int, incoming_user_id: int):
-        """Create a friend request."""
-        request = FriendRequests(
-            outgoing_user_id=outgoing_user_id,
-            incoming_user_id=incoming_user_id,
-            status="pending"
-        )
-        self.db.add(request)
-        self.db.commit()
-        self.db.refresh(request)
-        return request
+        return self.bulk_add([event])[0]
 
     # -----------
     # Tests
@@ -167,7 +72,7 @@ class TestMeAPI(unittest.TestCase):
 
     def test_get_me_returns_current_user(self):
         """Test GET /me returns current user information."""
-        res = self.client.get("/me", headers=self.get_auth_headers())
+        res = self.client.get("/me", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -186,10 +91,12 @@ class TestMeAPI(unittest.TestCase):
     def test_get_me_friends_returns_friends_list(self):
         """Test GET /me/friends returns list of friends."""
         # Create friendships
-        self.create_friendship(self.main_user.id, self.friend1.id)
-        self.create_friendship(self.main_user.id, self.friend2.id)
+        self.bulk_add([
+            Friends(user1_id=self.main_user.id, user2_id=self.friend1.id),
+            Friends(user1_id=self.main_user.id, user2_id=self.friend2.id),
+        ])
 
-        res = self.client.get("/me/friends", headers=self.get_auth_headers())
+        res = self.client.get("/me/friends", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -201,7 +108,7 @@ class TestMeAPI(unittest.TestCase):
 
     def test_get_me_friends_returns_empty_when_no_friends(self):
         """Test GET /me/friends returns empty list when user has no friends."""
-        res = self.client.get("/me/friends", headers=self.get_auth_headers())
+        res = self.client.get("/me/friends", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -211,14 +118,18 @@ class TestMeAPI(unittest.TestCase):
     def test_get_me_circles_returns_user_circles(self):
         """Test GET /me/circles returns circles user belongs to."""
         # Create circles
-        circle1 = self.create_circle("Tech Group", self.main_user.id, public=True)
-        circle2 = self.create_circle("Book Club", self.other_user.id, public=False)
+        circle1, circle2 = self.bulk_add([
+            Circle(name="Tech Group", owner=self.main_user.id, public=True),
+            Circle(name="Book Club", owner=self.other_user.id, public=False),
+        ])
 
         # Add main user to both circles
-        self.add_to_circle(self.main_user.id, circle1.id)
-        self.add_to_circle(self.main_user.id, circle2.id)
+        self.bulk_add([
+            CircleMembership(user_id=self.main_user.id, circle_id=circle1.id),
+            CircleMembership(user_id=self.main_user.id, circle_id=circle2.id),
+        ])
 
-        res = self.client.get("/me/circles", headers=self.get_auth_headers())
+        res = self.client.get("/me/circles", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -230,7 +141,7 @@ class TestMeAPI(unittest.TestCase):
 
     def test_get_me_circles_returns_empty_when_no_circles(self):
         """Test GET /me/circles returns empty list when user has no circles."""
-        res = self.client.get("/me/circles", headers=self.get_auth_headers())
+        res = self.client.get("/me/circles", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -244,10 +155,12 @@ class TestMeAPI(unittest.TestCase):
         event2 = self.create_event("Conference", "Tech conference")
 
         # Assign events to main user
-        self.add_event_ownership(self.main_user.id, event1.id)
-        self.add_event_ownership(self.main_user.id, event2.id)
+        self.bulk_add([
+            EventOwnership(user_id=self.main_user.id, event_id=event1.id),
+            EventOwnership(user_id=self.main_user.id, event_id=event2.id),
+        ])
 
-        res = self.client.get("/me/events", headers=self.get_auth_headers())
+        res = self.client.get("/me/events", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -259,7 +172,7 @@ class TestMeAPI(unittest.TestCase):
 
     def test_get_me_events_returns_empty_when_no_events(self):
         """Test GET /me/events returns empty list when user has no events."""
-        res = self.client.get("/me/events", headers=self.get_auth_headers())
+        res = self.client.get("/me/events", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -269,10 +182,12 @@ class TestMeAPI(unittest.TestCase):
     def test_get_incoming_friend_requests(self):
         """Test GET /me/friend-requests/incoming returns incoming requests."""
         # Create friend requests TO main user
-        self.create_friend_request(self.friend1.id, self.main_user.id)
-        self.create_friend_request(self.other_user.id, self.main_user.id)
+        self.bulk_add([
+            FriendRequests(outgoing_user_id=self.friend1.id, incoming_user_id=self.main_user.id, status="pending"),
+            FriendRequests(outgoing_user_id=self.other_user.id, incoming_user_id=self.main_user.id, status="pending"),
+        ])
 
-        res = self.client.get("/me/friend-requests/incoming", headers=self.get_auth_headers())
+        res = self.client.get("/me/friend-requests/incoming", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -289,10 +204,12 @@ class TestMeAPI(unittest.TestCase):
     def test_get_outgoing_friend_requests(self):
         """Test GET /me/friend-requests/outgoing returns outgoing requests."""
         # Create friend requests FROM main user
-        self.create_friend_request(self.main_user.id, self.friend1.id)
-        self.create_friend_request(self.main_user.id, self.friend2.id)
+        self.bulk_add([
+            FriendRequests(outgoing_user_id=self.main_user.id, incoming_user_id=self.friend1.id, status="pending"),
+            FriendRequests(outgoing_user_id=self.main_user.id, incoming_user_id=self.friend2.id, status="pending"),
+        ])
 
-        res = self.client.get("/me/friend-requests/outgoing", headers=self.get_auth_headers())
+        res = self.client.get("/me/friend-requests/outgoing", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -308,7 +225,7 @@ class TestMeAPI(unittest.TestCase):
 
         res = self.client.put(
             "/me/preferences",
-            headers=self.get_auth_headers(),
+            headers=self.auth_headers,
             json={"preferences": new_preferences}
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
@@ -317,14 +234,14 @@ class TestMeAPI(unittest.TestCase):
         self.assertEqual(body["preferences"], new_preferences)
 
         # Verify in database
-        self.db.refresh(self.main_user)
-        self.assertEqual(self.main_user.preferences, new_preferences)
+        main_user = self.db.get(User, self.main_user.id)
+        self.assertEqual(main_user.preferences, new_preferences)
 
     def test_update_preferences_to_empty_list(self):
         """Test PUT /me/preferences can set preferences to empty list."""
         res = self.client.put(
             "/me/preferences",
-            headers=self.get_auth_headers(),
+            headers=self.auth_headers,
             json={"preferences": []}
         )
         self.assertEqual(res.status_code, 200, msg=res.text)
@@ -333,28 +250,39 @@ class TestMeAPI(unittest.TestCase):
         self.assertEqual(body["preferences"], [])
 
         # Verify in database
-        self.db.refresh(self.main_user)
-        self.assertEqual(self.main_user.preferences, [])
+        main_user = self.db.get(User, self.main_user.id)
+        self.assertEqual(main_user.preferences, [])
+
+    def test_update_preferences_drops_duplicates_keeping_first_seen_order(self):
+        """Test PUT /me/preferences stores each preference once, in first-seen order."""
+        res = self.client.put(
+            "/me/preferences",
+            headers=self.auth_headers,
+            json={"preferences": ["travel", "sports", "travel", "music", "sports"]}
+        )
+        self.assertEqual(res.status_code, 200, msg=res.text)
+        self.assertEqual(res.json()["preferences"], ["travel", "sports", "music"])
+
+        # Verify in database
+        main_user = self.db.get(User, self.main_user.id)
+        self.assertEqual(main_user.preferences, ["travel", "sports", "music"])
 
     def test_me_endpoints_require_authentication(self):
         """Test that all /me endpoints require authentication."""
-        endpoints = [
-            "/me",
-            "/me/friends",
-            "/me/circles",
-            "/me/events",
-            "/me/friend-requests/incoming",
-            "/me/friend-requests/outgoing"
+        endpoints_and_methods = [
+            ("GET", "/me", None),
+            ("GET", "/me/friends", None),
+            ("GET", "/me/circles", None),
+            ("GET", "/me/events", None),
+            ("GET", "/me/friend-requests/incoming", None),
+            ("GET", "/me/friend-requests/outgoing", None),
+            ("PUT", "/me/preferences", {"preferences": []})
         ]
 
-        for endpoint in endpoints:
-            res = self.client.get(endpoint)
-            self.assertEqual(res.status_code, 401, msg=f"Endpoint {endpoint} should require auth")
-
-        # Test PUT endpoint
-        res = self.client.put("/me/preferences", json={"preferences": []})
-        self.assertEqual(res.status_code, 401, msg="/me/preferences should require auth")
-
+        for method, endpoint, json_data in endpoints_and_methods:
+            with self.subTest(method=method, endpoint=endpoint):
+                res = self.client.request(method, endpoint, json=json_data)
+                self.assertEqual(res.status_code, 401, msg=f"Endpoint {method} {endpoint} should require auth")
 
 if __name__ == "__main__":
     unittest.main()
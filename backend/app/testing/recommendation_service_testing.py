@@ -0,0 +1,158 @@
+import asyncio
+import unittest
+from typing import List
+from unittest import mock
+
+import httpx
+
+from app.services import recommendation_service
+from app.services.recommendation_service import RecommendationService
+
+
+LAT, LON = 35.78, -78.69
+KEY = (LAT, LON)
+
+POINTS_URL = f"https://api.weather.gov/points/{LAT},{LON}"
+FORECAST_URL = "https://api.weather.gov/gridpoints/RAH/73,57/forecast"
+# A cached grid cell NWS no longer serves
+STALE_GRID = ("OLD", 1, 2)
+STALE_FORECAST_URL = "https://api.weather.gov/gridpoints/OLD/1,2/forecast"
+
+POINTS_BODY = {
+    "properties": {
+        "forecast": FORECAST_URL,
+        "gridId": "RAH",
+        "gridX": 73,
+        "gridY": 57,
+    }
+}
+FORECAST_BODY = {
+    "properties": {
+        "periods": [
+            {
+                "name": "Today",
+                "temperature": 68,
+                "windSpeed": "5 mph",
+                "probabilityOfPrecipitation": {"value": 20},
+                "shortForecast": "Partly Cloudy",
+            }
+        ]
+    }
+}
+EXPECTED_WEATHER = "Today: 68°F, wind 5 mph, 20% precip, Partly Cloudy"
+
+# Captured before any test patches httpx.AsyncClient
+_RealAsyncClient = httpx.AsyncClient
+
+
+class TestWeatherFetch(unittest.IsolatedAsyncioTestCase):
+    """NWS weather fetching in RecommendationService, against a mocked api.weather.gov."""
+
+    def setUp(self) -> None:
+        self.service = RecommendationService(user_repository=None)
+        # Request URLs seen by the fake upstream, in order
+        self.requests: List[str] = []
+        # Responses block until this is set; tests that don't need to hold them open set it now
+        self.release = asyncio.Event()
+        self.points_status = 200
+
+        for cache in (recommendation_service._weather_inflight, recommendation_service._weather_grid_cache):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+        def client_factory(**kwargs) -> httpx.AsyncClient:
+            return _RealAsyncClient(transport=httpx.MockTransport(self.handle), **kwargs)
+
+        patcher = mock.patch.object(recommendation_service.httpx, "AsyncClient", side_effect=client_factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """Serve /points and the forecast for the fixture grid cell; 404 anything else."""
+        url = str(request.url)
+        self.requests.append(url)
+        await self.release.wait()
+        if url == POINTS_URL:
+            return httpx.Response(self.points_status, json=POINTS_BODY)
+        if url == FORECAST_URL:
+            return httpx.Response(200, json=FORECAST_BODY)
+        return httpx.Response(404)
+
+    # -----------
+    # Tests - Single-flight
+    # -----------
+
+    async def test_concurrent_fetches_share_one_upstream_request(self):
+        """Test concurrent fetches for one location make a single set of NWS calls."""
+        first = asyncio.ensure_future(self.service._fetch_weather_data(LAT, LON))
+        second = asyncio.ensure_future(self.service._fetch_weather_data(LAT, LON))
+        await asyncio.sleep(0)
+
+        # Both waiters are parked on the same in-flight task
+        self.assertEqual(list(recommendation_service._weather_inflight), [KEY])
+
+        self.release.set()
+        results = await asyncio.gather(first, second)
+
+        self.assertEqual(results, [EXPECTED_WEATHER, EXPECTED_WEATHER])
+        self.assertEqual(self.requests, [POINTS_URL, FORECAST_URL])
+        self.assertEqual(recommendation_service._weather_inflight, {})
+
+    async def test_cancelled_waiter_does_not_cancel_shared_fetch(self):
+        """Test cancelling one waiter leaves the shared fetch running for the others."""
+        first = asyncio.ensure_future(self.service._fetch_weather_data(LAT, LON))
+        second = asyncio.ensure_future(self.service._fetch_weather_data(LAT, LON))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        self.release.set()
+
+        self.assertEqual(await second, EXPECTED_WEATHER)
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual(self.requests, [POINTS_URL, FORECAST_URL])
+        self.assertEqual(recommendation_service._weather_inflight, {})
+
+    # -----------
+    # Tests - Grid cell cache
+    # -----------
+
+    async def test_known_grid_cell_skips_points_lookup(self):
+        """Test a location whose grid cell is cached needs only the forecast call."""
+        self.release.set()
+
+        first = await self.service._fetch_weather_data(LAT, LON)
+        self.assertEqual(recommendation_service._weather_grid_cache, {KEY: ("RAH", 73, 57)})
+
+        self.requests.clear()
+        second = await self.service._fetch_weather_data(LAT, LON)
+
+        self.assertEqual([first, second], [EXPECTED_WEATHER, EXPECTED_WEATHER])
+        self.assertEqual(self.requests, [FORECAST_URL])
+
+    async def test_stale_grid_cell_404_falls_back_to_points_lookup(self):
+        """Test a 404 for a cached grid cell evicts it and refetches /points."""
+        self.release.set()
+        recommendation_service._weather_grid_cache[KEY] = STALE_GRID
+
+        result = await self.service._fetch_weather_data(LAT, LON)
+
+        self.assertEqual(result, EXPECTED_WEATHER)
+        self.assertEqual(self.requests, [STALE_FORECAST_URL, POINTS_URL, FORECAST_URL])
+        self.assertEqual(recommendation_service._weather_grid_cache, {KEY: ("RAH", 73, 57)})
+
+    async def test_stale_grid_cell_is_evicted_when_points_lookup_fails(self):
+        """Test a 404 evicts the cached grid cell even if the fallback lookup errors."""
+        self.release.set()
+        self.points_status = 503
+        recommendation_service._weather_grid_cache[KEY] = STALE_GRID
+
+        result = await self.service._fetch_weather_data(LAT, LON)
+
+        self.assertEqual(result, "temp 75 F low wind no precipitation")
+        self.assertEqual(self.requests, [STALE_FORECAST_URL, POINTS_URL])
+        self.assertEqual(recommendation_service._weather_grid_cache, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
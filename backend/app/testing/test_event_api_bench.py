@@ -0,0 +1,90 @@
+"""
+Micro-benchmarks for the event endpoints, to catch regressions such as an N+1
+query sneaking into the event router.
+
+pytest.ini passes --benchmark-disable, so a normal test run executes each body
+once as a smoke test. Time them with:
+
+    pytest app/testing/test_event_api_bench.py -n 0 --benchmark-enable --benchmark-only
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Generator
+
+import orjson
+import pytest
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.database import get_db
+from app.models.user import User
+from app.models.event import Event, EventState
+from app.models.associations import EventOwnership
+from app.testing._base import TestingSessionLocal, client, engine
+from app.utils.jwt_utils import create_access_token
+
+
+_START = datetime.now() + timedelta(days=1)
+EVENT_BODY = orjson.dumps({
+    "name": "Bench Event",
+    "start_at": _START.isoformat(),
+    "end_at": (_START + timedelta(hours=2)).isoformat(),
+})
+UPDATE_BODY = orjson.dumps({"name": "Renamed Bench Event"})
+
+
+@pytest.fixture(scope="module")
+def api() -> Generator[SimpleNamespace, None, None]:
+    """A client, an owner's headers and one owned event, all rolled back at the end."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    db: Session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+
+    owner = User(username="owner", password="unused", name="Owner", preferences=[])
+    db.add(owner)
+    db.flush()
+    owned_event = Event(
+        name="Owned Event",
+        start_at=_START,
+        end_at=_START + timedelta(hours=2),
+        state=EventState.upcoming,
+    )
+    db.add(owned_event)
+    db.flush()
+    db.add(EventOwnership(user_id=owner.id, event_id=owned_event.id))
+    db.commit()
+
+    def override_get_db() -> Generator[Session, None, None]:
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    token = create_access_token(data={"sub": str(owner.id)})
+    try:
+        yield SimpleNamespace(
+            client=client,
+            headers={"Authorization": f"Bearer {token}", "content-type": "application/json"},
+            event_id=owned_event.id,
+        )
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+
+def test_create_event_bench(benchmark, api):
+    res = benchmark(lambda: api.client.post("/events", content=EVENT_BODY, headers=api.headers))
+    assert res.status_code == 201, res.text
+
+
+def test_get_event_bench(benchmark, api):
+    res = benchmark(lambda: api.client.get(f"/events/{api.event_id}", headers=api.headers))
+    assert res.status_code == 200, res.text
+
+
+def test_update_event_bench(benchmark, api):
+    res = benchmark(
+        lambda: api.client.put(f"/events/{api.event_id}", content=UPDATE_BODY, headers=api.headers)
+    )
+    assert res.status_code == 200, res.text
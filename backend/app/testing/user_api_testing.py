@@ -1,114 +1,82 @@
-from typing import List
 import unittest
-from typing import Generator
+from typing import List, Tuple
 
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from passlib.context import CryptContext
+from sqlalchemy.orm import Session
 
-from app.main import app
-from app.database import Base, get_db
 from app.models.user import User
 from app.models.circle import Circle
 from app.models.associations import Friends, CircleMembership
+from app.testing._base import BaseAPITest, HASHED_PASSWORD, PASSWORD, pwd_context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-
-engine = create_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-class TestUsersAPI(unittest.TestCase):
-    def setUp(self) -> None:
-        # Create tables for this test
-        Base.metadata.create_all(bind=engine)
-        self.db: Session = TestingSessionLocal()
-
-        # Override the app DB dependency to use the test session
-        def override_get_db() -> Generator[Session, None, None]:
-            yield self.db
-
-        app.dependency_overrides[get_db] = override_get_db
-        self.client = TestClient(app)
-
-        # Create an initial user for authentication in tests
-        self.setup_auth_user()
-
-    def tearDown(self) -> None:
-        # Cleanup dependency overrides + DB
-        app.dependency_overrides.clear()
-        self.db.close()
-        Base.metadata.drop_all(bind=engine)
 
+class TestUsersAPI(BaseAPITest):
     # -----------
     # Helpers
     # -----------
 
-    def setup_auth_user(self):
+    @classmethod
+    def setup_test_data(cls, db: Session):
         """Create an initial user directly in DB for authentication."""
         user = User(
             username="testadmin",
-            password=pwd_context.hash("password123"),
+            password=HASHED_PASSWORD,
             name="Test Admin",
             preferences=[]
         )
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-
-        # Login and store token
-        login_res = self.client.post(
-            "/login",
-            json={"username": "testadmin", "password": "password123"}
-        )
-        self.auth_token = login_res.json()["access_token"]
+        db.add(user)
+        db.commit()
 
-    def get_auth_headers(self) -> dict:
-        """Return Authorization header for authenticated requests."""
-        return {"Authorization": f"Bearer {self.auth_token}"}
+        # Sign the token in-process; /login itself is covered by the auth API tests
+        cls.auth_token, = cls.mint_tokens([user])
+        cls.auth_headers = cls.get_auth_headers(cls.auth_token)
 
     def create_user_direct(self, username: str, password: str, name: str):
         """Create user directly in database (bypasses authentication)."""
-        user = User(
-            username=username,
-            password=pwd_context.hash(password),
-            name=name,
-            preferences=[]
-        )
-        self.db.add(user)
+        return self.bulk_create_users([(username, password, name)])[0]
+
+    def bulk_create_users(self, specs: List[Tuple[str, str, str]]) -> List[User]:
+        """Create (username, password, name) users in database with one commit."""
+        # Hash each distinct password once, before building any rows
+        hashes = {
+            password: HASHED_PASSWORD if password == PASSWORD else pwd_context.hash(password)
+            for _, password, _ in specs
+        }
+        users = [
+            User(
+                username=username,
+                password=hashes[password],
+                name=name,
+                preferences=[]
+            )
+            for username, password, name in specs
+        ]
+        self.db.add_all(users)
         self.db.commit()
-        self.db.refresh(user)
-        return user
+        return users
 
-    def create_friendship(self, user1_id: int, user2_id: int):
-        """Create a friendship between two users."""
-        friendship = Friends(user1_id=user1_id, user2_id=user2_id)
-        self.db.add(friendship)
+    def bulk_create_friendships(self, edges: List[Tuple[int, int]]) -> List[Friends]:
+        """Create (user1_id, user2_id) friendships in database with one commit."""
+        friendships = [Friends(user1_id=a, user2_id=b) for a, b in edges]
+        self.db.add_all(friendships)
         self.db.commit()
-        return friendship
+        return friendships
 
     def create_circle(self, name: str, owner_id: int, public: bool = False):
         """Create a circle."""
         circle = Circle(name=name, owner=owner_id, public=public)
         self.db.add(circle)
         self.db.commit()
-        self.db.refresh(circle)
         return circle
 
-    def add_to_circle(self, user_id: int, circle_id: int):
-        """Add user to circle."""
-        membership = CircleMembership(user_id=user_id, circle_id=circle_id)
-        self.db.add(membership)
+    def bulk_add_to_circle(self, pairs: List[Tuple[int, int]]) -> List[CircleMembership]:
+        """Add (user_id, circle_id) memberships in database with one commit."""
+        memberships = [
+            CircleMembership(user_id=user_id, circle_id=circle_id)
+            for user_id, circle_id in pairs
+        ]
+        self.db.add_all(memberships)
         self.db.commit()
-        return membership
+        return memberships
 
     # -----------
     # Tests
@@ -119,7 +87,7 @@ class TestUsersAPI(unittest.TestCase):
         created = self.create_user_direct("alice", "password123", "Alice")
         user_id = created.id
 
-        res = self.client.get(f"/users/{user_id}", headers=self.get_auth_headers())
+        res = self.client.get(f"/users/{user_id}", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -129,7 +97,7 @@ class TestUsersAPI(unittest.TestCase):
 
     def test_get_current_user_returns_authenticated_user(self):
         """Test GET /me returns the authenticated user from JWT."""
-        res = self.client.get("/me", headers=self.get_auth_headers())
+        res = self.client.get("/me", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -144,18 +112,20 @@ class TestUsersAPI(unittest.TestCase):
     def test_get_all_users(self):
         """Test getting all users with authentication."""
         # Should have the testadmin user initially
-        res0 = self.client.get("/users", headers=self.get_auth_headers())
+        res0 = self.client.get("/users", headers=self.auth_headers)
         self.assertEqual(res0.status_code, 200, msg=res0.text)
         initial_users = res0.json()
         self.assertEqual(len(initial_users), 1)
         self.assertEqual(initial_users[0]["username"], "testadmin")
 
         # Add two more users directly to database
-        self.create_user_direct("u1", "password123", "User One")
-        self.create_user_direct("u2", "password123", "User Two")
+        self.bulk_create_users([
+            ("u1", "password123", "User One"),
+            ("u2", "password123", "User Two"),
+        ])
 
         # Should now have 3 users total
-        res = self.client.get("/users", headers=self.get_auth_headers())
+        res = self.client.get("/users", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -172,16 +142,17 @@ class TestUsersAPI(unittest.TestCase):
     def test_get_user_friends(self):
         """Test GET /users/{id}/friends returns user's friends."""
         # Create test users
-        user1 = self.create_user_direct("user1", "pass", "User One")
-        user2 = self.create_user_direct("user2", "pass", "User Two")
-        user3 = self.create_user_direct("user3", "pass", "User Three")
+        user1, user2, user3 = self.bulk_create_users([
+            ("user1", "pass", "User One"),
+            ("user2", "pass", "User Two"),
+            ("user3", "pass", "User Three"),
+        ])
 
         # Create friendships
-        self.create_friendship(user1.id, user2.id)
-        self.create_friendship(user1.id, user3.id)
+        self.bulk_create_friendships([(user1.id, user2.id), (user1.id, user3.id)])
 
         # Get user1's friends
-        res = self.client.get(f"/users/{user1.id}/friends", headers=self.get_auth_headers())
+        res = self.client.get(f"/users/{user1.id}/friends", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -195,7 +166,7 @@ class TestUsersAPI(unittest.TestCase):
         """Test GET /users/{id}/friends returns empty list when user has no friends."""
         user = self.create_user_direct("loner", "pass", "Lonely User")
 
-        res = self.client.get(f"/users/{user.id}/friends", headers=self.get_auth_headers())
+        res = self.client.get(f"/users/{user.id}/friends", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -204,7 +175,7 @@ class TestUsersAPI(unittest.TestCase):
 
     def test_get_user_friends_nonexistent_user(self):
         """Test GET /users/{id}/friends returns 404 for nonexistent user."""
-        res = self.client.get("/users/99999/friends", headers=self.get_auth_headers())
+        res = self.client.get("/users/99999/friends", headers=self.auth_headers)
         self.assertEqual(res.status_code, 404, msg=res.text)
 
     def test_get_user_circles(self):
@@ -217,11 +188,10 @@ class TestUsersAPI(unittest.TestCase):
         circle2 = self.create_circle("Book Club", user.id, public=False)
 
         # Add user to circles
-        self.add_to_circle(user.id, circle1.id)
-        self.add_to_circle(user.id, circle2.id)
+        self.bulk_add_to_circle([(user.id, circle1.id), (user.id, circle2.id)])
 
         # Get user's circles
-        res = self.client.get(f"/users/{user.id}/circles", headers=self.get_auth_headers())
+        res = self.client.get(f"/users/{user.id}/circles", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -235,7 +205,7 @@ class TestUsersAPI(unittest.TestCase):
         """Test GET /users/{id}/circles returns empty list when user has no circles."""
         user = self.create_user_direct("nocircles", "pass", "No Circles User")
 
-        res = self.client.get(f"/users/{user.id}/circles", headers=self.get_auth_headers())
+        res = self.client.get(f"/users/{user.id}/circles", headers=self.auth_headers)
         self.assertEqual(res.status_code, 200, msg=res.text)
 
         body = res.json()
@@ -244,7 +214,7 @@ class TestUsersAPI(unittest.TestCase):
 
     def test_get_user_circles_nonexistent_user(self):
         """Test GET /users/{id}/circles returns 404 for nonexistent user."""
-        res = self.client.get("/users/99999/circles", headers=self.get_auth_headers())
+        res = self.client.get("/users/99999/circles", headers=self.auth_headers)
         self.assertEqual(res.status_code, 404, msg=res.text)
 
     def test_user_endpoints_require_authentication(self):
@@ -0,0 +1,30 @@
+import unittest
+
+from app.models.user import User
+
+
+class TestUserModel(unittest.TestCase):
+    """Write-time normalization on the User model, without a database."""
+
+    def make_user(self, preferences) -> User:
+        return User(username="user", password="unused", name="User", preferences=preferences)
+
+    def test_preferences_drop_duplicates_keeping_first_seen_order(self):
+        """Test duplicate preferences are dropped, keeping each one's first position."""
+        user = self.make_user(["travel", "sports", "travel", "music", "sports"])
+        self.assertEqual(user.preferences, ["travel", "sports", "music"])
+
+    def test_preferences_none_becomes_empty_list(self):
+        """Test None is stored as an empty list."""
+        user = self.make_user(None)
+        self.assertEqual(user.preferences, [])
+
+    def test_preferences_reassignment_is_normalized(self):
+        """Test assigning preferences on an existing user goes through the same rules."""
+        user = self.make_user([])
+        user.preferences = ["coding", "coding"]
+        self.assertEqual(user.preferences, ["coding"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,38 @@
-from datetime import datetime, timedelta
-from typing import Dict
-from jose import JWTError, jwt
+import base64
+import hashlib
+import hmac
+import json
+import time
+from functools import lru_cache
+from typing import Any, Dict
+from jose import ExpiredSignatureError, JWTError, jwt
 from app.config import settings
 
+def _b64url(data: bytes) -> bytes:
+    """Base64url-encode without padding, as JWS requires."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# The encoded header is the same for every HS256 token (same JSON as python-jose)
+_HS256_HEADER = _b64url(
+    json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":"), sort_keys=True).encode()
+)
+
+
+@lru_cache(maxsize=8)
+def _hs256_signer(key: str) -> "hmac.HMAC":
+    """HMAC-SHA256 keyed with key; copy() it per token to skip the key setup."""
+    return hmac.new(key.encode(), digestmod=hashlib.sha256)
+
+
+def _encode_hs256(claims: Dict[str, Any], key: str) -> str:
+    """Encode claims as an HS256 JWT, byte-for-byte what jwt.encode produces."""
+    payload = _b64url(json.dumps(claims, separators=(",", ":")).encode())
+    signing_input = _HS256_HEADER + b"." + payload
+    signer = _hs256_signer(key).copy()
+    signer.update(signing_input)
+    return (signing_input + b"." + _b64url(signer.digest())).decode("ascii")
+
 
 def create_access_token(data: Dict[str, str]) -> str:
     """
@@ -15,8 +45,13 @@ def create_access_token(data: Dict[str, str]) -> str:
         Encoded JWT token string
     """
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=settings.JWT_ACCESS_TOKEN_EXPIRE_HOURS)
-    to_encode.update({"exp": expire})
+    # "exp" is a unix timestamp; read the lifetime per call so patched settings apply
+    to_encode["exp"] = int(time.time()) + settings.JWT_ACCESS_TOKEN_EXPIRE_HOURS * 3600
+
+    # HS256 is the configured default; sign it directly instead of through
+    # python-jose's generic algorithm/key dispatch
+    if settings.JWT_ALGORITHM == "HS256":
+        return _encode_hs256(to_encode, settings.JWT_SECRET_KEY)
 
     encoded_jwt = jwt.encode(
         to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
@@ -24,6 +59,18 @@ def create_access_token(data: Dict[str, str]) -> str:
     return encoded_jwt
 
 
+@lru_cache(maxsize=1024)
+def _decode_cached(token: str, key: str, algorithm: str) -> Dict[str, Any]:
+    """
+    Decode and verify a JWT token, memoized on (token, key, algorithm).
+
+    Only successful decodes are cached; a token that fails verification raises
+    and is checked again on its next use. The expiry of a cached token is
+    re-checked by verify_token on every call.
+    """
+    return jwt.decode(token, key, algorithms=[algorithm])
+
+
 def verify_token(token: str) -> Dict[str, str]:
     """
     Verify and decode a JWT token.
@@ -38,7 +85,12 @@ def verify_token(token: str) -> Dict[str, str]:
         JWTError: If token is invalid or malformed
         ExpiredSignatureError: If token has expired
     """
-    payload = jwt.decode(
-        token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-    )
-    return payload
+    payload = _decode_cached(token, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+
+    # The cached signature check stays valid, but expiry depends on the clock
+    exp = payload.get("exp")
+    if exp is not None and time.time() > exp:
+        raise ExpiredSignatureError("Signature has expired.")
+
+    # Copy so callers can't mutate the cached payload
+    return dict(payload)